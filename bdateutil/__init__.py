@@ -26,17 +26,42 @@ from datetime import time as basetime
 from datetime import timedelta, tzinfo
 
 import bdateutil
-from bdateutil.parser import parse, parserinfo
+from bdateutil.arrays import bday_count_array, bday_offset_array, isbday_array
+from bdateutil.bcalendar import BusinessCalendar, compile_holidays
+from bdateutil.parallel import expand_merged, expand_rule, expand_rules
+from bdateutil.parser import (
+    parse,
+    parse_cache,
+    parse_many,
+    parse_stream,
+    parserinfo,
+)
 from bdateutil.relativedelta import relativedelta
 from bdateutil.relativedelta import MO, TU, WE, TH, FR, SA, SU, weekday
 from bdateutil.rrule import *
 
 
-def isbday(dt, holidays=None):
+def isbday(dt, holidays=None, calendar=None):
+    if calendar is not None:
+        return calendar.isbday(dt)
     if holidays is None:
         holidays = HOLIDAYS
-    dt = parse(dt)
-    return dt.weekday() in WORKDAYS and dt not in holidays
+    # date and datetime objects skip the parser
+    if not isinstance(dt, basedate):
+        dt = parse(dt)
+    if dt.weekday() not in WORKDAYS:
+        return False
+    return not compile_holidays(holidays).contains_ordinal(dt.toordinal())
+
+
+def isbday_many(dts, holidays=None, calendar=None):
+    """Yield :func:`isbday` for every item of the iterable ``dts``, which
+    may mix dates, datetimes, strings and timestamps. The holidays and
+    weekmask are resolved once, so per-item cost is a weekday test and a
+    set lookup."""
+    if calendar is None:
+        calendar = BusinessCalendar(holidays=holidays)
+    return calendar.isbday_many(dts)
 
 
 class date(basedate):
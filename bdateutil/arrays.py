@@ -0,0 +1,259 @@
+#  bdateutil
+#  -----------
+#  Adds business day logic and improved data type flexibility to
+#  python-dateutil. 100% backwards compatible with python-dateutil,
+#  simply replace dateutil imports with bdateutil.
+#
+#  Author:  ryanss <ryanssdev@icloud.com>
+#  Website: https://github.com/ryanss/bdateutil
+#  License: MIT (see LICENSE file)
+
+
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bdateutil.bcalendar import BusinessCalendar
+
+
+# Day ordinal of the datetime64 epoch, 1970-01-01 (a Thursday)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MAX_ORDINAL = date.max.toordinal()
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("bdateutil array functions require numpy")
+
+
+def _calendar(calendar, holidays):
+    if calendar is None:
+        calendar = BusinessCalendar(holidays=holidays)
+    return calendar
+
+
+def to_days(arr):
+    """Convert ``arr`` to a ``datetime64[D]`` array. Accepts datetime64
+    arrays of any unit (times of day are floored), and sequences of
+    date/datetime objects or ISO strings."""
+    _require_numpy()
+    arr = np.asarray(arr)
+    if arr.dtype.kind == "M":
+        return arr.astype("datetime64[D]")
+    return np.asarray(arr, dtype="datetime64[D]")
+
+
+def _weekday_mask(calendar):
+    return np.array([calendar.weekmask >> wd & 1 for wd in range(7)], dtype=bool)
+
+
+def _holiday_days(calendar, days, valid):
+    """Return the sorted holidays of ``calendar`` covering ``days``, as int64
+    days since the epoch."""
+    if not valid.any():
+        return np.empty(0, dtype=np.int64)
+    lo = max(int(days[valid].min()) + EPOCH_ORDINAL, 1)
+    hi = min(int(days[valid].max()) + EPOCH_ORDINAL + 1, MAX_ORDINAL + 1)
+    hols = calendar.holiday_ordinals(lo, hi)
+    return np.array(hols, dtype=np.int64) - EPOCH_ORDINAL
+
+
+def _isbday_days(days, calendar):
+    """Business day mask for int64 days since the epoch, NaT as False."""
+    valid = days != np.iinfo(np.int64).min
+    ret = _weekday_mask(calendar)[(days + 3) % 7] & valid
+    hols = _holiday_days(calendar, days, valid)
+    if len(hols):
+        idx = np.searchsorted(hols, days)
+        hit = hols[np.minimum(idx, len(hols) - 1)] == days
+        ret &= ~hit
+    return ret
+
+
+def isbday_array(arr, calendar=None, holidays=None):
+    """Vectorized :func:`bdateutil.isbday`.
+
+    Returns a boolean array with the shape of ``arr`` that is True where the
+    date falls on a working weekday that is not a holiday. NaT is never a
+    business day. Holidays and weekdays come from ``calendar``, or from
+    ``holidays`` and ``bdateutil.WORKDAYS`` when no calendar is given.
+    """
+    calendar = _calendar(calendar, holidays)
+    days = to_days(arr).view(np.int64)
+    return _isbday_days(days, calendar)
+
+
+ROLLS = (
+    None,
+    "raise",
+    "forward",
+    "following",
+    "backward",
+    "preceding",
+    "modifiedfollowing",
+    "modifiedpreceding",
+)
+
+_NAT = np.iinfo(np.int64).min if np is not None else None
+
+
+def _years(days):
+    return days.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+def _months(ordinals):
+    days = np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL
+    return days.astype("datetime64[D]").astype("datetime64[M]")
+
+
+def _index_arrays(calendar, first_year, last_year):
+    start, cum, bdays = calendar.index.covering(int(first_year), int(last_year))
+    return (
+        start,
+        np.frombuffer(cum, dtype=np.intc),
+        np.frombuffer(bdays, dtype=np.intc),
+    )
+
+
+def bday_offset_array(arr, bdays, roll=None, calendar=None, holidays=None):
+    """Vectorized ``arr + relativedelta(bdays=bdays)``.
+
+    ``arr`` is a datetime64 array or a sequence of dates and ``bdays`` an
+    integer array broadcastable against it, or a scalar. ``roll`` decides
+    what happens to a start date that is not a business day:
+
+    * None (default): the same as :class:`relativedelta`, the start date
+      is never counted, so +1 from a Saturday lands on Monday and -1 on
+      Friday, while 0 leaves the date where it is.
+    * ``"raise"``: raise ValueError.
+    * ``"forward"``/``"following"``: roll to the next business day first.
+    * ``"backward"``/``"preceding"``: roll to the previous business day.
+    * ``"modifiedfollowing"``: roll forward unless that leaves the month,
+      in which case roll backward.
+    * ``"modifiedpreceding"``: roll backward unless that leaves the month,
+      in which case roll forward.
+
+    Returns an array of the input's datetime64 unit, keeping any time of
+    day, or ``datetime64[D]`` for sequences of date objects. NaT stays NaT.
+    """
+    _require_numpy()
+    if roll not in ROLLS:
+        raise ValueError("roll must be one of %s" % ", ".join(map(str, ROLLS)))
+    calendar = _calendar(calendar, holidays)
+    arr = np.asarray(arr)
+    if arr.dtype.kind != "M":
+        arr = to_days(arr)
+    days = arr.astype("datetime64[D]").view(np.int64)
+    days, n = np.broadcast_arrays(days, np.asarray(bdays, dtype=np.int64))
+    arr = np.broadcast_to(arr, days.shape)
+    valid = days != _NAT
+    if not valid.any():
+        return arr.copy()
+    ordinals = np.where(valid, days + EPOCH_ORDINAL, days[valid][0] + EPOCH_ORDINAL)
+    if roll == "raise" and not _isbday_days(days[valid], calendar).all():
+        raise ValueError("Non-business day date in bday_offset_array")
+
+    workdays = bin(calendar.weekmask).count("1")
+    pad = int(np.abs(n).max()) * 7 // workdays // 365 + 1
+    first_year = int(_years(days[valid]).min()) - (pad if (n < 0).any() else 0)
+    last_year = int(_years(days[valid]).max()) + (pad if (n > 0).any() else 0)
+    # Rolling moves a date at most a few weeks, so a year on either side
+    # leaves room for it
+    if roll is not None:
+        first_year -= 1
+        last_year += 1
+    while True:
+        start, cum, bdays_ = _index_arrays(calendar, first_year, last_year)
+        end = start + len(cum) - 1
+        pos = ordinals - start
+        # Number of business days strictly before / up to each date
+        before = cum[pos].astype(np.int64)
+        upto = cum[pos + 1].astype(np.int64)
+        if roll is None:
+            idx = np.where(n > 0, upto + n - 1, before + n)
+        else:
+            following = before
+            preceding = upto - 1
+            if roll.startswith("modified"):
+                month = _months(ordinals)
+                last = len(bdays_) - 1
+                f_ok = (following <= last) & (
+                    _months(bdays_[np.minimum(following, last)]) == month
+                )
+                p_ok = (preceding >= 0) & (
+                    _months(bdays_[np.maximum(preceding, 0)]) == month
+                )
+                if roll == "modifiedfollowing":
+                    k = np.where(f_ok | ~p_ok, following, preceding)
+                else:
+                    k = np.where(p_ok | ~f_ok, preceding, following)
+            elif roll in ("raise", "forward", "following"):
+                k = following
+            else:
+                k = preceding
+            idx = k + n
+        if ((idx >= 0) & (idx < len(bdays_))).all():
+            break
+        if (idx < 0).any():
+            if start <= 1:
+                raise OverflowError("date value out of range")
+            first_year -= pad
+        if (idx >= len(bdays_)).any():
+            if end > MAX_ORDINAL:
+                raise OverflowError("date value out of range")
+            last_year += pad
+    target = bdays_[idx].astype(np.int64)
+    if roll is None:
+        target = np.where(n == 0, ordinals, target)
+    shift = np.where(valid, target - ordinals, 0).astype("timedelta64[D]")
+    return arr + shift
+
+
+def _to_datetime64(arr):
+    _require_numpy()
+    arr = np.asarray(arr)
+    if arr.dtype.kind == "M":
+        return arr
+    if arr.dtype.kind in "OUS":
+        return np.asarray(arr, dtype="datetime64[us]")
+    return to_days(arr)
+
+
+def bday_count_array(dt1, dt2, calendar=None, holidays=None):
+    """Vectorized ``relativedelta(dt1, dt2).bdays``.
+
+    ``dt1`` and ``dt2`` are datetime64 arrays or sequences of dates,
+    broadcastable against each other. Returns an int64 array with the same
+    sign and endpoint rules as :class:`relativedelta`: the business days
+    the earlier date steps onto as it advances a day at a time until it
+    reaches or passes the later date, plus one if the later date is not a
+    business day itself, negated where ``dt2`` is after ``dt1``. NaT values
+    raise ValueError.
+    """
+    _require_numpy()
+    calendar = _calendar(calendar, holidays)
+    a, b = np.broadcast_arrays(_to_datetime64(dt1), _to_datetime64(dt2))
+    if np.isnat(a).any() or np.isnat(b).any():
+        raise ValueError("NaT in bday_count_array input")
+    if not a.size:
+        return np.zeros(a.shape, dtype=np.int64)
+    hi = np.maximum(a, b)
+    lo = np.minimum(a, b)
+    hi_days = hi.astype("datetime64[D]").view(np.int64)
+    lo_days = lo.astype("datetime64[D]").view(np.int64)
+    delta = hi - lo
+    one_day = np.timedelta64(1, "D")
+    steps = delta // one_day + (delta % one_day != np.timedelta64(0, "D"))
+    first = lo_days + EPOCH_ORDINAL + 1
+    last = first + steps
+
+    years = _years(np.concatenate([lo_days.ravel(), hi_days.ravel()]))
+    start, cum, _ = _index_arrays(calendar, years.min(), years.max() + 1)
+    if last.max() - start >= len(cum):
+        raise OverflowError("date value out of range")
+    ret = cum[last - start].astype(np.int64) - cum[first - start]
+    ret += ~_isbday_days(hi_days, calendar)
+    return np.where(b > a, -ret, ret)
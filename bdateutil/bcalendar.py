@@ -0,0 +1,540 @@
+#  bdateutil
+#  -----------
+#  Adds business day logic and improved data type flexibility to
+#  python-dateutil. 100% backwards compatible with python-dateutil,
+#  simply replace dateutil imports with bdateutil.
+#
+#  Author:  ryanss <ryanssdev@icloud.com>
+#  Website: https://github.com/ryanss/bdateutil
+#  License: MIT (see LICENSE file)
+
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, timedelta
+import threading
+
+from bdateutil.parser import parse
+
+
+MINYEAR = date.min.year
+MAXYEAR = date.max.year
+MAXORDINAL = date.max.toordinal()
+
+# Bit n set means weekday n (0 == Monday) is a working day
+DEFAULT_WEEKMASK = 0b0011111
+
+
+def weekmask(workdays):
+    """Return the 7-bit weekmask for an iterable of weekday numbers."""
+    mask = 0
+    for wd in workdays:
+        mask |= 1 << wd
+    return mask
+
+
+def default_weekmask():
+    """Return the weekmask of ``bdateutil.WORKDAYS``, read at call time so
+    that changes to the module default apply everywhere."""
+    import bdateutil
+
+    return weekmask(bdateutil.WORKDAYS)
+
+
+def _year_start(year):
+    return date(year, 1, 1).toordinal()
+
+
+def _year_end(year):
+    return date(year, 12, 31).toordinal() + 1
+
+
+def _ordinal(dt):
+    if isinstance(dt, date):
+        return dt.toordinal()
+    return parse(dt).toordinal()
+
+
+_partial_week_tables = {}
+
+
+def partial_week_table(mask):
+    """Return ``table[wd][r]``, the number of workdays among ``r``
+    consecutive days (0 <= r <= 7) starting on weekday ``wd``."""
+    table = _partial_week_tables.get(mask)
+    if table is None:
+        table = tuple(
+            tuple(sum(mask >> ((wd + i) % 7) & 1 for i in range(r)) for r in range(8))
+            for wd in range(7)
+        )
+        _partial_week_tables[mask] = table
+    return table
+
+
+_next_workday_tables = {}
+
+
+def next_workday_table(mask):
+    """Return ``table[wd]``, the number of days from a day on weekday ``wd``
+    to the first workday after it (1 <= distance <= 7)."""
+    table = _next_workday_tables.get(mask)
+    if table is None:
+        if not mask & 0b1111111:
+            raise ValueError("weekmask must contain at least one workday")
+        table = tuple(
+            next(i for i in range(1, 8) if mask >> ((wd + i) % 7) & 1)
+            for wd in range(7)
+        )
+        _next_workday_tables[mask] = table
+    return table
+
+
+class HolidaySet(object):
+    """Holidays compiled to day ordinals.
+
+    Membership is a hash lookup on integers and range queries bisect a
+    sorted ``array('i')``. Plain containers (list, tuple, set, dict) are
+    compiled in one pass. Other mappings such as ``holidays.HolidayBase``
+    compute their years on demand, so they are loaded one contiguous range
+    of years at a time; any other container is probed day by day for the
+    years requested.
+    """
+
+    def __init__(self, holidays=()):
+        if holidays is None:
+            holidays = ()
+        self.source = holidays
+        self.indexes = {}
+        self._lock = threading.Lock()
+        self._static = type(holidays) in (list, tuple, set, frozenset, dict)
+        # Bumped whenever the compiled holidays change so that dependent
+        # indexes know to rebuild
+        self.version = 0
+        self._load()
+
+    def _load(self, first_year=None, last_year=None):
+        source = self.source
+        if self._static:
+            ordinals = set(_ordinal(hol) for hol in source)
+            lo, hi = 0, _year_end(MAXYEAR)
+        elif first_year is None:
+            ordinals = set()
+            lo = hi = 0
+        else:
+            lo, hi = _year_start(first_year), _year_end(last_year)
+            if isinstance(source, dict):
+                for year in range(first_year, last_year + 1):
+                    # Membership tests populate the year when expand=True
+                    date(year, 1, 1) in source
+                ordinals = set(
+                    o for o in (_ordinal(hol) for hol in source) if lo <= o < hi
+                )
+            else:
+                ordinals = set(
+                    o for o in range(lo, hi) if date.fromordinal(o) in source
+                )
+        self._token = self._source_token()
+        self._state = (lo, hi, frozenset(ordinals), array("i", sorted(ordinals)))
+        self.version += 1
+
+    def _source_token(self):
+        if self._static or isinstance(self.source, dict):
+            return len(self.source)
+        return None
+
+    def is_stale(self):
+        """Return True if the source container changed size since it was
+        compiled, e.g. after ``list.append`` or ``HolidayBase.append``."""
+        return self._token != self._source_token()
+
+    def reload(self):
+        with self._lock:
+            lo, hi = self._state[0], self._state[1]
+            if self._static or lo == hi:
+                self._load()
+            else:
+                self._load(date.fromordinal(lo).year, date.fromordinal(hi - 1).year)
+
+    def ensure(self, start, end):
+        """Make sure holidays are compiled for every year touched by the
+        ordinal range ``[start, end)`` and return the internal state."""
+        state = self._state
+        if state[0] <= start and end <= state[1]:
+            return state
+        with self._lock:
+            state = self._state
+            lo, hi = state[0], state[1]
+            if lo <= start and end <= hi:
+                return state
+            first_year = date.fromordinal(start).year
+            last_year = date.fromordinal(end - 1).year
+            if lo != hi:
+                # Extend by at least the span already loaded so that
+                # scanning forward or backward year by year stays amortized
+                lo_year = date.fromordinal(lo).year
+                hi_year = date.fromordinal(hi - 1).year
+                span = hi_year - lo_year + 1
+                if first_year < lo_year:
+                    first_year = max(min(first_year, lo_year - span), MINYEAR)
+                else:
+                    first_year = lo_year
+                if last_year > hi_year:
+                    last_year = min(max(last_year, hi_year + span), MAXYEAR)
+                else:
+                    last_year = hi_year
+            self._load(first_year, last_year)
+            return self._state
+
+    def contains_ordinal(self, ordinal):
+        state = self._state
+        if not state[0] <= ordinal < state[1]:
+            state = self.ensure(ordinal, ordinal + 1)
+        return ordinal in state[2]
+
+    def __contains__(self, dt):
+        return self.contains_ordinal(_ordinal(dt))
+
+    def ordinals(self, start, end):
+        """Return the sorted array of holiday ordinals in ``[start, end)``."""
+        if end <= start:
+            return array("i")
+        ordinals = self.ensure(start, end)[3]
+        return ordinals[bisect_left(ordinals, start) : bisect_left(ordinals, end)]
+
+    def __getstate__(self):
+        # Pickles carry the compiled ordinals, so that other processes do
+        # not have to compile the holidays again
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["indexes"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return not self._static or bool(self._state[2])
+
+    __nonzero__ = __bool__
+
+
+_HOLIDAY_CACHE_SIZE = 64
+_holiday_cache = OrderedDict()
+_holiday_cache_lock = threading.Lock()
+
+
+def compile_holidays(holidays):
+    """Return the :class:`HolidaySet` for a holiday container. Compiled sets
+    are cached by the identity of ``holidays``, so passing the same object
+    again costs a dictionary lookup."""
+    if isinstance(holidays, HolidaySet):
+        return holidays
+    if holidays is None:
+        holidays = ()
+    key = id(holidays)
+    # Hits stay lock-free: OrderedDict lookups and reordering are atomic
+    hs = _holiday_cache.get(key)
+    if hs is not None and hs.source is holidays:
+        try:
+            _holiday_cache.move_to_end(key)
+        except KeyError:  # evicted by another thread meanwhile
+            pass
+    else:
+        hs = None
+    if hs is None:
+        hs = HolidaySet(holidays)
+        with _holiday_cache_lock:
+            _holiday_cache[key] = hs
+            while len(_holiday_cache) > _HOLIDAY_CACHE_SIZE:
+                _holiday_cache.popitem(last=False)
+    elif hs.is_stale():
+        hs.reload()
+    return hs
+
+
+def count_bdays(start, end, mask=DEFAULT_WEEKMASK, holidays=()):
+    """Return the number of business days in the ordinal range
+    ``[start, end)``: whole weeks times workdays per week, plus a partial
+    week table lookup, minus the workday holidays found by bisection."""
+    if end <= start:
+        return 0
+    table = partial_week_table(mask)
+    weeks, rem = divmod(end - start, 7)
+    ret = weeks * table[0][7] + table[(start - 1) % 7][rem]
+    holidays = compile_holidays(holidays)
+    if holidays:
+        for o in holidays.ordinals(start, end):
+            ret -= mask >> ((o - 1) % 7) & 1
+    return ret
+
+
+class BDayIndex(object):
+    """Cumulative business-day index over a lazily extended range of years.
+
+    ``cum[i]`` holds the number of business days in ``[start, start + i)``
+    and ``bdays`` the sorted ordinals of every business day in range, so
+    shifting or counting by business days is a pair of array lookups.
+    """
+
+    def __init__(self, mask=DEFAULT_WEEKMASK, holidays=()):
+        if not mask & 0b1111111:
+            raise ValueError("weekmask must contain at least one workday")
+        self.mask = mask
+        self.holidays = compile_holidays(holidays)
+        self._lock = threading.Lock()
+        # (first_year, last_year, start, cum, bdays, holidays version),
+        # replaced atomically
+        self._state = None
+
+    def _build(self, first_year, last_year):
+        start = _year_start(first_year)
+        end = _year_end(last_year)
+        mask = self.mask
+        hols = set(self.holidays.ordinals(start, end))
+        version = self.holidays.version
+        step = next_workday_table(mask)
+        cum = [0]
+        bdays = []
+        n = 0
+        # Jump from workday to workday, filling in the counts of the days
+        # skipped in between as one run
+        o = start - 1 + step[(start - 2) % 7]
+        while o < end:
+            if o not in hols:
+                bdays.append(o)
+                cum += [n] * (o - start + 1 - len(cum))
+                n += 1
+                cum.append(n)
+            o += step[(o - 1) % 7]
+        cum += [n] * (end - start + 1 - len(cum))
+        return (
+            first_year,
+            last_year,
+            start,
+            array("i", cum),
+            array("i", bdays),
+            version,
+        )
+
+    def _ensure(self, first_year, last_year):
+        """Return an index state covering the given years, extending it if
+        necessary. Extensions at least double the covered span so that
+        repeated misses stay amortized."""
+        state = self._state
+        if (
+            state is not None
+            and state[0] <= first_year
+            and last_year <= state[1]
+            and state[5] == self.holidays.version
+        ):
+            return state
+        with self._lock:
+            state = self._state
+            if state is not None and state[5] != self.holidays.version:
+                first_year = min(first_year, state[0])
+                last_year = max(last_year, state[1])
+            elif state is not None:
+                span = state[1] - state[0] + 1
+                if first_year < state[0]:
+                    first_year = min(first_year, state[0] - span)
+                else:
+                    first_year = state[0]
+                if last_year > state[1]:
+                    last_year = max(last_year, state[1] + span)
+                else:
+                    last_year = state[1]
+            first_year = max(first_year, MINYEAR)
+            last_year = min(last_year, MAXYEAR)
+            state = self._build(first_year, last_year)
+            self._state = state
+        return state
+
+    def covering(self, first_year, last_year):
+        """Return ``(start, cum, bdays)`` for an index covering at least the
+        given years, clamped to the years supported by ``date``."""
+        state = self._ensure(max(first_year, MINYEAR), min(last_year, MAXYEAR))
+        return state[2], state[3], state[4]
+
+    def _years_for(self, ordinal, n):
+        """Estimate the calendar years spanned by moving ``n`` business days
+        away from ``ordinal``."""
+        year = date.fromordinal(ordinal).year
+        workdays = bin(self.mask & 0b1111111).count("1")
+        years = abs(n) * 7 // workdays // 365 + 1
+        if n > 0:
+            return year, min(year + years, MAXYEAR)
+        return max(year - years, MINYEAR), year
+
+    def offset(self, ordinal, n):
+        """Return the ordinal of the date ``n`` business days away from
+        ``ordinal``, matching day-by-day stepping: the start date itself is
+        never counted, whether or not it is a business day."""
+        if not n:
+            return ordinal
+        if n > 0:
+            return self.nth(ordinal + 1, n - 1)
+        first_year, last_year = self._years_for(ordinal, n)
+        while True:
+            state = self._ensure(first_year, last_year)
+            i = state[3][ordinal - state[2]] + n
+            if i >= 0:
+                return state[4][i]
+            if state[0] <= MINYEAR:
+                raise OverflowError("date value out of range")
+            first_year = state[0] - 1
+
+    def count(self, start, end):
+        """Return the number of business days in the ordinal range
+        ``[start, end)``."""
+        if end <= start:
+            return 0
+        state = self._ensure(
+            date.fromordinal(start).year, date.fromordinal(end - 1).year
+        )
+        cum = state[3]
+        return cum[end - state[2]] - cum[start - state[2]]
+
+    def nth_between(self, start, end, n):
+        """Return the ordinal of the ``n``-th business day (counting from
+        0, or from the end if negative) in ``[start, end)``, or None if the
+        range has too few business days."""
+        state = self._ensure(
+            date.fromordinal(start).year, date.fromordinal(end - 1).year
+        )
+        cum = state[3]
+        lo = cum[start - state[2]]
+        hi = cum[end - state[2]]
+        i = lo + n if n >= 0 else hi + n
+        if lo <= i < hi:
+            return state[4][i]
+        return None
+
+    def nth(self, ordinal, n):
+        """Return the ordinal of the ``n``-th business day (counting from
+        0) on or after ``ordinal``."""
+        if ordinal > MAXORDINAL:
+            raise OverflowError("date value out of range")
+        first_year, last_year = self._years_for(ordinal, n + 1)
+        while True:
+            state = self._ensure(first_year, last_year)
+            i = state[3][ordinal - state[2]] + n
+            if i < len(state[4]):
+                return state[4][i]
+            if state[1] >= MAXYEAR:
+                raise OverflowError("date value out of range")
+            last_year = state[1] + 1
+
+
+def bday_index(holidays=(), mask=DEFAULT_WEEKMASK):
+    """Return the shared :class:`BDayIndex` for a weekmask and holiday
+    container. Indexes live on the compiled :class:`HolidaySet`, so they
+    share its identity-keyed cache."""
+    holidays = compile_holidays(holidays)
+    index = holidays.indexes.get(mask)
+    if index is None:
+        index = holidays.indexes.setdefault(mask, BDayIndex(mask, holidays))
+    return index
+
+
+class BusinessCalendar(object):
+    """Business rules bundled into one reusable object: the working
+    weekdays, the holidays and the business hours.
+
+    A calendar compiles its holidays once and owns the business-day index
+    and weekmask tables built from them, so a single instance can be
+    created at start-up and passed as ``calendar=`` to :func:`isbday`,
+    :class:`relativedelta` and :class:`rrule`. Arguments left as None take
+    the module defaults ``bdateutil.WORKDAYS``, ``HOLIDAYS``, ``BTSTART``
+    and ``BTEND``.
+    """
+
+    def __init__(self, workdays=None, holidays=None, btstart=None, btend=None):
+        import bdateutil
+
+        if workdays is None:
+            workdays = bdateutil.WORKDAYS
+        if holidays is None:
+            holidays = bdateutil.HOLIDAYS
+        self.weekmask = weekmask(workdays)
+        if not self.weekmask:
+            raise ValueError("workdays must contain at least one weekday")
+        self.workdays = tuple(wd for wd in range(7) if self.weekmask >> wd & 1)
+        self.holidays = holidays
+        self.btstart = bdateutil.BTSTART if btstart is None else btstart
+        self.btend = bdateutil.BTEND if btend is None else btend
+        self.reload()
+
+    def reload(self):
+        """Recompile the holidays, e.g. after adding dates to the holiday
+        container this calendar was built from."""
+        self._holidays = compile_holidays(self.holidays)
+        if self._holidays.is_stale():
+            self._holidays.reload()
+        self.index = bday_index(self._holidays, self.weekmask)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["index"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.index = bday_index(self._holidays, self.weekmask)
+
+    @property
+    def holiday_set(self):
+        """The compiled :class:`HolidaySet` of this calendar."""
+        return self._holidays
+
+    def isbday(self, dt):
+        """Return True if ``dt`` falls on a working weekday that is not a
+        holiday."""
+        ordinal = _ordinal(dt)
+        return bool(
+            self.weekmask >> ((ordinal - 1) % 7) & 1
+        ) and not self._holidays.contains_ordinal(ordinal)
+
+    def isbday_many(self, dts):
+        """Yield :meth:`isbday` for every item of the iterable ``dts``."""
+        mask = self.weekmask
+        holidays = self._holidays
+        for dt in dts:
+            if not isinstance(dt, date):
+                dt = parse(dt)
+            ordinal = dt.toordinal()
+            if mask >> ((ordinal - 1) % 7) & 1:
+                state = holidays._state
+                if state[0] <= ordinal < state[1]:
+                    yield ordinal not in state[2]
+                else:
+                    yield not holidays.contains_ordinal(ordinal)
+            else:
+                yield False
+
+    def offset(self, dt, bdays):
+        """Return ``dt`` moved by ``bdays`` business days, the same as
+        ``dt + relativedelta(bdays=bdays, calendar=self)``."""
+        dt = parse(dt)
+        ordinal = dt.toordinal()
+        return dt + timedelta(days=self.index.offset(ordinal, bdays) - ordinal)
+
+    def count(self, start, end):
+        """Return the number of business days in the ordinal range
+        ``[start, end)``."""
+        return count_bdays(start, end, self.weekmask, self._holidays)
+
+    def holiday_ordinals(self, start, end):
+        """Return the sorted ``array('i')`` of holiday ordinals in
+        ``[start, end)``."""
+        return self._holidays.ordinals(start, end)
+
+    def __repr__(self):
+        return "%s(workdays=%r, holidays=%r, btstart=%r, btend=%r)" % (
+            self.__class__.__name__,
+            self.workdays,
+            self.holidays,
+            self.btstart,
+            self.btend,
+        )
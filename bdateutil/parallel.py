@@ -0,0 +1,179 @@
+#  bdateutil
+#  -----------
+#  Adds business day logic and improved data type flexibility to
+#  python-dateutil. 100% backwards compatible with python-dateutil,
+#  simply replace dateutil imports with bdateutil.
+#
+#  Author:  ryanss <ryanssdev@icloud.com>
+#  Website: https://github.com/ryanss/bdateutil
+#  License: MIT (see LICENSE file)
+
+
+import copy
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta, timezone
+
+from bdateutil.bcalendar import BusinessCalendar, compile_holidays
+
+
+# Calendars installed in a worker process by _init_worker, keyed by the
+# key _detach gave them in the parent process
+_calendars = {}
+
+
+def _init_worker(calendars):
+    _calendars.clear()
+    _calendars.update(calendars)
+
+
+def _register(calendar, key, calendars):
+    calendars.setdefault(key, calendar)
+    return key
+
+
+def _detach(rule, calendars):
+    """Return a picklable copy of ``rule`` whose calendar and holidays are
+    replaced by keys into ``calendars``, so that a calendar crosses the
+    process boundary once per worker instead of once per task."""
+    from bdateutil.rrule import rrule, rruleset
+
+    ret = copy.copy(rule)
+    if isinstance(rule, rruleset):
+        ret._rrule = [_detach(r, calendars) for r in rule._rrule]
+        ret._exrule = [_detach(r, calendars) for r in rule._exrule]
+        if rule._calendar is not None:
+            ret._calendar = _register(rule._calendar, id(rule._calendar), calendars)
+        elif rule._holidays is not None:
+            holidays = compile_holidays(rule._holidays)
+            ret._holidays = _register(holidays, id(holidays), calendars)
+    elif isinstance(rule, rrule):
+        calendar = rule._calendar
+        if calendar is None:
+            # Resolve bdateutil.WORKDAYS now: workers may not share its value
+            holidays = compile_holidays(rule._holidays)
+            calendar = BusinessCalendar(holidays=holidays)
+            key = (id(holidays), calendar.weekmask)
+        else:
+            key = id(calendar)
+        ret._calendar = _register(calendar, key, calendars)
+        ret._holidays = None
+    return ret
+
+
+def _attach(rule):
+    from bdateutil.rrule import rrule, rruleset
+
+    if isinstance(rule, rruleset):
+        rule._rrule = [_attach(r) for r in rule._rrule]
+        rule._exrule = [_attach(r) for r in rule._exrule]
+        if rule._calendar is not None:
+            rule._calendar = _calendars[rule._calendar]
+        elif rule._holidays is not None:
+            rule._holidays = _calendars[rule._holidays]
+    elif isinstance(rule, rrule):
+        rule._calendar = _calendars[rule._calendar]
+        rule._holidays = rule._calendar.holidays
+    return rule
+
+
+def _expand(task):
+    from bdateutil.rrule import rrule
+
+    rule, window, as_arrays = task
+    rule = _attach(rule)
+    if window is None:
+        if as_arrays and isinstance(rule, rrule):
+            return rule.to_array()
+        ret = list(rule)
+    else:
+        after, before = window
+        ret = rule.between(after, before, inc=True)
+        if ret and ret[-1] == before:
+            ret.pop()
+    if as_arrays:
+        from bdateutil.arrays import np
+
+        if ret and ret[0].tzinfo is not None:
+            ret = [dt.astimezone(timezone.utc).replace(tzinfo=None) for dt in ret]
+        return np.array(ret, dtype="datetime64[s]")
+    return ret
+
+
+def _run(rules, windows, max_workers, chunksize, as_arrays):
+    calendars = {}
+    tasks = [
+        (_detach(rule, calendars), window, as_arrays)
+        for rule, window in zip(rules, windows)
+    ]
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(calendars,)
+    ) as executor:
+        return list(executor.map(_expand, tasks, chunksize=chunksize))
+
+
+def expand_rules(rules, max_workers=None, chunksize=1, as_arrays=False):
+    """Expand every rule of ``rules`` in a pool of ``max_workers`` processes
+    and return a list with the occurrences of each rule, in the order of
+    ``rules``. Calendars and holidays shared by several rules are sent to
+    each worker once, when it starts, rather than with every rule.
+
+    With ``as_arrays`` each rule is returned as a ``datetime64[s]`` array
+    (see :meth:`rrule.to_array`), which is much cheaper to send back from
+    the workers than datetime objects. Requires numpy.
+    """
+    rules = list(rules)
+    return _run(rules, [None] * len(rules), max_workers, chunksize, as_arrays)
+
+
+def expand_merged(rules, max_workers=None, chunksize=1):
+    """Expand ``rules`` like :func:`expand_rules` and return an iterator
+    over all their occurrences merged in ascending order."""
+    return heapq.merge(*expand_rules(rules, max_workers, chunksize))
+
+
+def _windows(rule, partitions):
+    """Split the span of ``rule`` into ``partitions`` half-open ranges, or
+    return a single None window when the span is unknown."""
+    from bdateutil.rrule import rrule
+
+    if not isinstance(rule, rrule) or partitions < 2:
+        return [None]
+    start = rule._dtstart
+    if rule._until is not None:
+        end = rule._until
+    elif rule._is_native() and rule._count is not None:
+        # Plain BDAILY rules find their last occurrence from the index
+        end = rule[-1] if rule.count() else start
+    else:
+        return [None]
+    if end <= start:
+        return [None]
+    step = (end - start) / partitions
+    bounds = [start + step * i for i in range(partitions)]
+    bounds.append(end + timedelta(microseconds=1))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def expand_rule(rule, partitions=None, max_workers=None, as_arrays=False):
+    """Expand a single rule by splitting its span into ``partitions``
+    consecutive date ranges (by default four per worker) that are expanded
+    in a pool of ``max_workers`` processes, and return its occurrences in
+    order, as a list or, with ``as_arrays``, one ``datetime64[s]`` array.
+
+    Only rules with an ``until``, and plain BDAILY rules with a ``count``,
+    have a known span; others are expanded by a single worker. Ranges are
+    found with :meth:`rrule.between`, which plain BDAILY rules answer from
+    the business day index; other rules iterate from ``dtstart`` up to each
+    range, so they gain less from partitioning.
+    """
+    if partitions is None:
+        partitions = 4 * (max_workers or os.cpu_count() or 1)
+    windows = _windows(rule, partitions)
+    results = _run([rule] * len(windows), windows, max_workers, 1, as_arrays)
+    if as_arrays:
+        from bdateutil.arrays import np
+
+        return np.concatenate(results)
+    return [dt for result in results for dt in result]
@@ -9,25 +9,238 @@
 #  License: MIT (see LICENSE file)
 
 
+import codecs
+from collections import OrderedDict, namedtuple
 from datetime import date, datetime, time, timedelta
+from itertools import chain, islice
+import re
+import threading
+import time as _time
 
+from dateutil import tz
 from dateutil.parser import parser, parserinfo
 import six
 
 
-def parse(timestr, parserinfo=None, **kwargs):
+# YYYY-MM-DD, optionally followed by THH:MM[:SS[.ffffff]][Z|+HH[[:]MM]]
+_ISO_RE = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})"
+    r"(?:[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?"
+    r"(?:(Z)|([+-])([0-9]{2})(?::?([0-9]{2}))?)?)?\Z"
+)
+
+# tzoffset instances by offset in seconds, at most one per minute of a day
+_tzoffsets = {}
+
+
+def _parse_iso(timestr):
+    """Build the datetime dateutil's parser returns for a plain ISO-8601
+    string without running the parser, or return None for anything else.
+    """
+    m = _ISO_RE.match(timestr)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, frac, z, sign, tzh, tzm = m.groups()
+    try:
+        ret = datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int(frac.ljust(6, "0")) if frac else 0,
+        )
+    except ValueError:
+        return None
+    return _with_offset(ret, z, sign, tzh, tzm)
+
+
+def _with_offset(ret, z, sign, tzh, tzm):
+    """Attach the tzinfo dateutil's parser gives a ``Z`` or ``+HH[[:]MM]``
+    suffix to the naive ``ret``, or return None for an invalid offset."""
+    if z:
+        offset = 0
+    elif sign:
+        if int(tzh) > 23 or tzm and int(tzm) > 59:
+            return None
+        offset = int(tzh) * 3600 + int(tzm or 0) * 60
+        if sign == "-":
+            offset = -offset
+    else:
+        return ret
+    if offset:
+        tzinfo = _tzoffsets.get(offset)
+        if tzinfo is None:
+            tzinfo = _tzoffsets.setdefault(offset, tz.tzoffset(None, offset))
+        return ret.replace(tzinfo=tzinfo)
+    # dateutil names zero offsets UTC, which is the local zone if the local
+    # zone is called UTC
+    if "UTC" not in _time.tzname:
+        return ret.replace(tzinfo=tz.UTC)
+    ret = ret.replace(tzinfo=tz.tzlocal())
+    if ret.tzname() != "UTC":
+        folded = tz.enfold(ret, fold=1)
+        if folded.tzname() == "UTC":
+            ret = folded
+    if ret.tzname() != "UTC":
+        ret = ret.replace(tzinfo=tz.UTC)
+    return ret
+
+
+# Parsers shared between parse() calls, keyed by the identity of their
+# parserinfo instance or class: (info, parser, expiry timestamp)
+_PARSER_CACHE_SIZE = 64
+_parsers = OrderedDict()
+_parsers_lock = threading.Lock()
+
+
+def _next_year():
+    """Return the timestamp of the next local new year, when parserinfo
+    instances built now get a stale window for two-digit years."""
+    year = _time.localtime().tm_year
+    return _time.mktime((year + 1, 1, 1, 0, 0, 0, 0, 1, -1))
+
+
+def _get_parser(info=None):
+    """Return the shared parser for ``info``, a parserinfo instance or
+    class, or dateutil's default parserinfo if None. Parsers for classes
+    are rebuilt at the new year, which moves the two-digit year window."""
+    if info is None:
+        info = parserinfo
+    key = id(info)
+    # Hits stay lock-free: OrderedDict lookups and reordering are atomic
+    entry = _parsers.get(key)
+    if entry is not None and entry[0] is info and entry[2] > _time.time():
+        try:
+            _parsers.move_to_end(key)
+        except KeyError:  # evicted by another thread meanwhile
+            pass
+        return entry[1]
+    if isinstance(info, type):
+        entry = (info, parser(info()), _next_year())
+    else:
+        entry = (info, parser(info), float("inf"))
+    with _parsers_lock:
+        _parsers[key] = entry
+        while len(_parsers) > _PARSER_CACHE_SIZE:
+            _parsers.popitem(last=False)
+    return entry[1]
+
+
+ParseCacheInfo = namedtuple("ParseCacheInfo", "hits misses evictions maxsize currsize")
+
+
+def _next_midnight():
+    now = _time.localtime()
+    return _time.mktime((now.tm_year, now.tm_mon, now.tm_mday + 1, 0, 0, 0, 0, 1, -1))
+
+
+class _ParseCache(object):
+    """Bounded LRU cache of :func:`parse` results for strings and bytes,
+    keyed by the input before decoding, the parserinfo and the keyword
+    options; calls with unhashable options, such as a ``tzinfos`` dict,
+    are never cached. Results are datetimes, which are immutable, so they
+    are shared between callers.
+
+    The cache is off unless ``enabled`` is set, or ``cache=True`` is passed
+    to :func:`parse`. It is emptied at local midnight, because strings
+    without a date, like ``"10:30"``, parse to the current day.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.enabled = False
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._expires = _next_midnight()
+        self._hits = self._misses = self._evictions = 0
+
+    def parse(self, timestr, parserinfo, kwargs):
+        key = (timestr, parserinfo, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if key is None or not self.maxsize:
+            with self._lock:
+                self._misses += 1
+            return _parse(timestr, parserinfo, kwargs)
+        with self._lock:
+            if _time.time() >= self._expires:
+                self._cache.clear()
+                self._expires = _next_midnight()
+            ret = self._cache.get(key)
+            if ret is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return ret
+            self._misses += 1
+        ret = _parse(timestr, parserinfo, kwargs)
+        with self._lock:
+            self._cache[key] = ret
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return ret
+
+    def cache_info(self):
+        """Return the hits, misses, evictions, maxsize and current size of
+        the cache."""
+        with self._lock:
+            return ParseCacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self.maxsize,
+                len(self._cache),
+            )
+
+    def cache_clear(self):
+        """Empty the cache and reset its statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+parse_cache = _ParseCache()
+
+
+def parse(timestr, parserinfo=None, cache=None, **kwargs):
+    """Return the datetime for ``timestr``: a string, bytes, a file-like
+    object, or an int/float timestamp. Dates, datetimes, times and
+    timedeltas are returned unchanged. ``parserinfo`` may be a dateutil
+    parserinfo instance or subclass, and ``kwargs`` are passed on to
+    dateutil's parser.
+
+    Strings and bytes are looked up in :data:`parse_cache` if it is
+    enabled, or if ``cache`` is True; ``cache=False`` skips it.
+
+    Parsers are shared between calls, one per parserinfo instance or
+    class. dateutil parsers keep no state between calls, so parse() is
+    safe to call from several threads at once.
+    """
     if getattr(timestr, "read", False):
         timestr = timestr.read()
 
+    if cache or cache is None and parse_cache.enabled:
+        if isinstance(timestr, (six.binary_type, six.string_types)):
+            return parse_cache.parse(timestr, parserinfo, kwargs)
+    return _parse(timestr, parserinfo, kwargs)
+
+
+def _parse(timestr, parserinfo, kwargs):
     if isinstance(timestr, six.binary_type):
         timestr = timestr.decode()
 
     if isinstance(timestr, six.string_types):
+        # Plain ISO-8601 strings skip the general parser
+        if parserinfo is None and not kwargs:
+            ret = _parse_iso(timestr)
+            if ret is not None:
+                return ret
         try:
-            if parserinfo:
-                ret = parser(parserinfo).parse(timestr, **kwargs)
-            else:
-                ret = parser().parse(timestr, **kwargs)
+            ret = _get_parser(parserinfo).parse(timestr, **kwargs)
         except TypeError:
             raise ValueError("Can't parse date from string '%s'" % timestr)
     elif isinstance(timestr, int) or isinstance(timestr, float):
@@ -40,3 +253,387 @@ def parse(timestr, parserinfo=None, **kwargs):
         raise TypeError("Can't convert %s to date." % type(timestr))
 
     return ret
+
+
+# Tokens of a sample string for format inference: digit runs, letter runs
+# and the separators between them
+_TOKEN_RE = re.compile(r"[0-9]+|[A-Za-z]+|[^0-9A-Za-z]+")
+_OFFSET_RE = re.compile(r"(Z|[+-][0-9]{2}(?::?[0-9]{2})?)\Z")
+
+# Regular expressions of the fields of a plan, and how plan_format shows
+# them
+_FIELD_RES = {
+    "Y": "([0-9]{4})",
+    "m": "([0-9]{1,2})",
+    "d": "([0-9]{1,2})",
+    "H": "([0-9]{1,2})",
+    "M": "([0-9]{2})",
+    "S": "([0-9]{2})",
+    "f": "([0-9]+)",
+    "b": "([A-Za-z]+)",
+    "a": "([A-Za-z]+)",
+    "p": "([A-Za-z]+)",
+    "z": "(?:(Z)|([+-])([0-9]{2})(?::?([0-9]{2}))?)",
+}
+
+
+class _Plan(object):
+    """A fixed format compiled from a sample string: a tuple of field
+    codes (strptime letters) and ``"="``-prefixed literal separators.
+
+    :meth:`build` returns the datetime the full parser gives a matching
+    string, or None to leave the string to the full parser. The parser
+    reads a numeric day and month in either order depending on their
+    values, so :meth:`check` finds which order it picks when both are 12
+    or less, and whether it accepts each order when only one is valid.
+    """
+
+    def __init__(self, items, info):
+        self.items = items
+        self.info = info
+        self.fields = [item for item in items if item in _FIELD_RES]
+        self.regex = re.compile(
+            "".join(
+                _FIELD_RES[item] if item in _FIELD_RES else re.escape(item[1:])
+                for item in items
+            )
+            + r"\Z"
+        )
+        self.numeric = "m" in self.fields and "d" in self.fields
+        # Order of ambiguous days and months, "md" (as in the format),
+        # "dm" or None, and whether the parser agrees with each order when
+        # it is the only valid one
+        self.ambiguous = None
+        self.forced = self.forced_swap = False
+
+    def __str__(self):
+        ret = []
+        for item in self.items:
+            if item == "H" and "p" in self.items:
+                # A 12-hour clock is parsed like H but written as strftime's I
+                ret.append("%I")
+            elif item in _FIELD_RES:
+                ret.append("%" + item)
+            else:
+                ret.append(item[1:].replace("%", "%%"))
+        return "".join(ret)
+
+    def build(self, timestr, order=None):
+        m = self.regex.match(timestr)
+        if m is None:
+            return None
+        groups = iter(m.groups())
+        info = self.info
+        year = month = day = None
+        hour = minute = second = micro = 0
+        ampm = None
+        offset = None
+        for field in self.fields:
+            if field == "z":
+                offset = (next(groups), next(groups), next(groups), next(groups))
+                continue
+            value = next(groups)
+            if field == "Y":
+                year = int(value)
+            elif field == "m":
+                month = int(value)
+            elif field == "d":
+                day = int(value)
+            elif field == "H":
+                hour = int(value)
+            elif field == "M":
+                minute = int(value)
+            elif field == "S":
+                second = int(value)
+            elif field == "f":
+                micro = int(value[:6].ljust(6, "0"))
+            elif field == "b":
+                month = info.month(value)
+                if month is None:
+                    return None
+            elif field == "a":
+                if info.weekday(value) is None:
+                    return None
+            elif field == "p":
+                ampm = info.ampm(value)
+                if ampm is None or not 1 <= hour <= 12:
+                    return None
+        if ampm is not None:
+            if hour < 12 and ampm == 1:
+                hour += 12
+            elif hour == 12 and ampm == 0:
+                hour = 0
+        if order is None and self.numeric:
+            if month > 12:
+                if day > 12 or not self.forced_swap:
+                    return None
+                order = "dm"
+            elif day <= 12:
+                order = self.ambiguous
+                if order is None:
+                    return None
+            elif not self.forced:
+                return None
+        if order == "dm":
+            month, day = day, month
+        try:
+            ret = datetime(year, month, day, hour, minute, second, micro)
+        except ValueError:
+            return None
+        if offset is not None:
+            return _with_offset(ret, *offset)
+        return ret
+
+    def check(self, parser, kwargs):
+        """Compare the plan with the parser on made-up dates, setting the
+        day/month orders it agrees with. Return False if the parser reads
+        the format differently."""
+
+        def agrees(day, month, order):
+            timestr = _render(self, day, month)
+            try:
+                ref = parser.parse(timestr, **kwargs)
+            except (ValueError, OverflowError):
+                return False
+            return _same(self.build(timestr, order), ref)
+
+        self.forced = agrees(13, 2, "md")
+        if not self.numeric:
+            return self.forced
+        self.forced_swap = agrees(2, 13, "dm")
+        if agrees(1, 2, "md"):
+            self.ambiguous = "md"
+        elif agrees(1, 2, "dm"):
+            self.ambiguous = "dm"
+        return True
+
+
+def _plan_items(timestr, ref, info):
+    """Return the fields of ``timestr`` as a tuple of field codes and
+    ``"="``-prefixed literals, or None if it has no fixed format."""
+    suffix = ()
+    if ref.tzinfo is not None:
+        m = _OFFSET_RE.search(timestr)
+        if m is None:
+            return None
+        timestr = timestr[: m.start()]
+        suffix = ("z",)
+    tokens = _TOKEN_RE.findall(timestr)
+    items = [None] * len(tokens)
+    # The time of day is the first H:MM, with optional :SS and .fraction
+    for i in range(len(tokens) - 2):
+        if tokens[i].isdigit() and tokens[i + 1] == ":" and tokens[i + 2].isdigit():
+            items[i], items[i + 2] = "H", "M"
+            j = i + 3
+            if j + 1 < len(tokens) and tokens[j] == ":" and tokens[j + 1].isdigit():
+                items[j + 1] = "S"
+                j += 2
+                if j + 1 < len(tokens) and tokens[j] == "." and tokens[j + 1].isdigit():
+                    items[j + 1] = "f"
+            break
+    numbers = []
+    for i, token in enumerate(tokens):
+        if items[i] is not None:
+            continue
+        if token.isdigit():
+            numbers.append(i)
+        elif token.isalpha() and info.month(token) is not None:
+            items[i] = "b"
+        elif token.isalpha() and info.weekday(token) is not None:
+            items[i] = "a"
+        elif token.isalpha() and info.ampm(token) is not None and "H" in items:
+            items[i] = "p"
+        else:
+            items[i] = "=" + token
+    years = [i for i in numbers if len(tokens[i]) == 4]
+    rest = [i for i in numbers if len(tokens[i]) != 4]
+    if len(years) != 1 or len(rest) != (1 if "b" in items else 2):
+        return None
+    items[years[0]] = "Y"
+    # Days and months are labelled in the order the parser read them
+    if len(rest) == 1:
+        items[rest[0]] = "d"
+    elif int(tokens[rest[0]]) == ref.month:
+        items[rest[0]], items[rest[1]] = "m", "d"
+    else:
+        items[rest[0]], items[rest[1]] = "d", "m"
+    return tuple(items) + suffix
+
+
+def _render(plan, day, month):
+    """Return a string in the format of ``plan`` for 2001-``month``-``day``
+    03:04:05.6 +01:00, with no check that the date exists."""
+    values = {
+        "Y": "2001",
+        "m": "%02d" % month,
+        "d": "%02d" % day,
+        "H": "03",
+        "M": "04",
+        "S": "05",
+        "f": "6",
+        "b": plan.info.MONTHS[(month - 1) % 12][0],
+        "a": plan.info.WEEKDAYS[0][0],
+        "p": plan.info.AMPM[0][0],
+        "z": "+01:00",
+    }
+    return "".join(values.get(item, item[1:]) for item in plan.items)
+
+
+def _same(a, b):
+    return repr(a) == repr(b) and repr(a.tzinfo) == repr(b.tzinfo)
+
+
+def _infer_plan(samples, parser, kwargs):
+    """Return the :class:`_Plan` that reproduces the full parser on the
+    most ``samples``, or None."""
+    plans = {}
+    support = {}
+    for timestr in samples:
+        try:
+            ref = parser.parse(timestr, **kwargs)
+        except (ValueError, OverflowError):
+            continue
+        items = _plan_items(timestr, ref, parser.info)
+        if items is None:
+            continue
+        if items not in plans:
+            plan = _Plan(items, parser.info)
+            plans[items] = plan if plan.check(parser, kwargs) else None
+        plan = plans[items]
+        if plan is not None and _same(plan.build(timestr), ref):
+            support[items] = support.get(items, 0) + 1
+    if not support:
+        return None
+    return plans[max(support, key=support.get)]
+
+
+class _ManyParser(object):
+    """Iterator over the datetimes of :func:`parse_many`."""
+
+    def __init__(self, iterable, parserinfo, sample, kwargs):
+        self._parserinfo = parserinfo
+        self._kwargs = kwargs
+        it = iter(iterable)
+        head = list(islice(it, sample))
+        self._it = chain(head, it)
+        self.total = 0
+        self.fast = 0
+        self.plan = None
+        # The plan replaces the parser's heuristics only where they are
+        # settled by the day/month order options
+        if set(kwargs) <= {"dayfirst", "yearfirst"}:
+            samples = [
+                x.decode() if isinstance(x, six.binary_type) else x
+                for x in head
+                if isinstance(x, (six.binary_type, six.string_types))
+            ]
+            self.plan = _infer_plan(samples, _get_parser(parserinfo), kwargs)
+
+    @property
+    def fast_ratio(self):
+        """The fraction of the items so far that the plan parsed."""
+        return self.fast / float(self.total) if self.total else 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        timestr = next(self._it)
+        self.total += 1
+        if isinstance(timestr, six.binary_type):
+            timestr = timestr.decode()
+        if self.plan is not None and isinstance(timestr, six.string_types):
+            ret = self.plan.build(timestr)
+            if ret is not None:
+                self.fast += 1
+                return ret
+        return parse(timestr, self._parserinfo, **self._kwargs)
+
+    next = __next__
+
+
+def parse_many(iterable, parserinfo=None, sample=100, **kwargs):
+    """Parse every item of ``iterable`` like :func:`parse`, for columns of
+    strings in one format.
+
+    The first ``sample`` strings are parsed with the full parser and the
+    format that reproduces most of them, with the day/month order the
+    parser chose, is compiled to a regular expression, e.g.
+    ``%d/%m/%Y %H:%M``. Matching items are built straight from it; other
+    items, and any the parser would read differently, go to :func:`parse`,
+    so the results are always the same as parse()'s. The plan covers
+    numeric dates with a four-digit year, month and weekday names,
+    ``H:MM[:SS[.f]]`` times, AM/PM and ``Z``/``+HH:MM`` offsets. Only the
+    ``dayfirst`` and ``yearfirst`` options are supported with a plan.
+
+    Returns an iterator whose ``plan`` attribute is the inferred format,
+    or None, and whose ``total``, ``fast`` and ``fast_ratio`` attributes
+    report how many items took the plan.
+    """
+    return _ManyParser(iterable, parserinfo, sample, kwargs)
+
+
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+
+
+def _records(fileobj, sep, encoding, errors, chunksize):
+    """Yield the records of ``fileobj`` split on ``sep``, reading
+    ``chunksize`` bytes or characters at a time."""
+    decoder = None
+    buf = ""
+    eof = False
+    while not eof:
+        chunk = fileobj.read(chunksize)
+        eof = not chunk
+        if isinstance(chunk, six.binary_type):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)(errors)
+            # The decoder holds back a character split across chunks
+            chunk = decoder.decode(chunk, final=eof)
+        buf += chunk
+        if sep is None:
+            # A "\r" ending the chunk may start a "\r\n"; either way the
+            # "\n" then ends an empty record, which is skipped
+            records = _NEWLINE_RE.split(buf)
+        else:
+            records = buf.split(sep)
+        buf = records.pop()
+        for record in records:
+            record = record.strip()
+            if record:
+                yield record
+    buf = buf.strip()
+    if buf:
+        yield buf
+
+
+def parse_stream(
+    fileobj,
+    sep=None,
+    parserinfo=None,
+    encoding="utf-8",
+    errors="strict",
+    chunksize=1 << 16,
+    sample=100,
+    **kwargs
+):
+    """Parse a datetime from each record of the file object ``fileobj``,
+    e.g. a log file, like :func:`parse_many`.
+
+    Records are separated by ``sep``, or by any line ending when ``sep``
+    is None, and surrounding whitespace and blank records are skipped.
+    The file is read ``chunksize`` bytes or characters at a time, so
+    memory use is bounded by the chunk size and the longest record rather
+    than the file size. Files opened in binary mode are decoded
+    incrementally with ``encoding`` and ``errors``, so multibyte
+    characters may straddle chunks.
+
+    Returns the iterator of :func:`parse_many`, with its ``plan`` and
+    ``fast_ratio`` attributes.
+    """
+    if isinstance(sep, six.binary_type):
+        sep = sep.decode(encoding)
+    if sep == "":
+        raise ValueError("empty separator")
+    records = _records(fileobj, sep, encoding, errors, chunksize)
+    return _ManyParser(records, parserinfo, sample, kwargs)
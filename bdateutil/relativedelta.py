@@ -9,18 +9,34 @@
 #  License: MIT (see LICENSE file)
 
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 from dateutil.relativedelta import relativedelta as rd
 from dateutil.relativedelta import MO, TU, WE, TH, FR, SA, SU, weekday
 import six
 
+from bdateutil.bcalendar import (
+    bday_index,
+    compile_holidays,
+    count_bdays,
+    default_weekmask,
+)
 from bdateutil.parser import parse
 
 
 class relativedelta(rd):
-    def __init__(self, dt1=None, dt2=None, bdays=None, holidays=(), *args, **kwargs):
+    def __init__(
+        self,
+        dt1=None,
+        dt2=None,
+        bdays=None,
+        holidays=(),
+        *args,
+        calendar=None,
+        **kwargs
+    ):
         self.holidays = holidays
+        self.calendar = calendar
         if dt1 and dt2:
             # Convert to datetime objects
             dt1 = parse(dt1)
@@ -35,12 +51,23 @@ class relativedelta(rd):
             bdays = 0
             d1 = max(dt1, dt2)
             d2 = min(dt1, dt2)
-            if d1.weekday() in (5, 6) or d1 in self.holidays:
-                bdays += 1
-            while d1 > d2:
-                d2 = rd(days=+1) + d2
-                if d2.weekday() not in (5, 6) and d2 not in self.holidays:
+            # Count the business days d2 would land on when stepped forward
+            # one day at a time until it reaches or passes d1
+            delta = d1 - d2
+            steps = delta.days + (1 if delta.seconds or delta.microseconds else 0)
+            start = d2.toordinal() + 1
+            if calendar is not None:
+                if not calendar.isbday(d1):
                     bdays += 1
+                bdays += calendar.count(start, start + steps)
+            else:
+                hols = compile_holidays(holidays)
+                mask = default_weekmask()
+                if not mask >> d1.weekday() & 1 or hols.contains_ordinal(
+                    d1.toordinal()
+                ):
+                    bdays += 1
+                bdays += count_bdays(start, start + steps, mask, hols)
             self.bdays = bdays
             if dt2 > dt1:
                 self.bdays *= -1
@@ -60,14 +87,13 @@ class relativedelta(rd):
             return ret
 
         ret = parse(other)
-        if getattr(self, "bdays", None) is not None:
-            bdays = self.bdays
-            a = +1 if bdays > 0 else -1
-            while bdays != 0:
-                ret += rd(days=a)
-                while ret.weekday() in (5, 6) or ret in self.holidays:
-                    ret += rd(days=a)
-                bdays -= a
+        if getattr(self, "bdays", None):
+            ordinal = ret.toordinal()
+            if self.calendar is not None:
+                index = self.calendar.index
+            else:
+                index = bday_index(self.holidays, default_weekmask())
+            ret += timedelta(days=index.offset(ordinal, self.bdays) - ordinal)
 
         return rd.__add__(self, ret)
 
@@ -92,6 +118,8 @@ class relativedelta(rd):
             months=-self.months,
             days=-self.days,
             bdays=bdays,
+            holidays=self.holidays,
+            calendar=self.calendar,
             hours=-self.hours,
             minutes=-self.minutes,
             seconds=-self.seconds,
@@ -122,6 +150,8 @@ class relativedelta(rd):
             months=int(self.months * f),
             days=int(self.days * f),
             bdays=bdays,
+            holidays=self.holidays,
+            calendar=self.calendar,
             hours=int(self.hours * f),
             minutes=int(self.minutes * f),
             seconds=int(self.seconds * f),
@@ -9,56 +9,742 @@
 #  License: MIT (see LICENSE file)
 
 
+from bisect import bisect_right as _bisect_right
+from collections import OrderedDict as _OrderedDict
+from collections import namedtuple as _namedtuple
+from datetime import date as _date
+from datetime import datetime as _datetime
+from datetime import timedelta as _timedelta
+from datetime import timezone as _timezone
+from itertools import islice as _islice
+import io as _io
+import pickle as _pickle
+import threading as _threading
+
 from dateutil.rrule import *
 from dateutil.rrule import weekday
 from dateutil.rrule import rrule as rrulebase
+from dateutil.rrule import rruleset as rrulesetbase
+from dateutil.rrule import _invalidates_cache
 from dateutil.rrule import _rrulestr as rrulestrbase
 
+from bdateutil import arrays as _arrays
 from bdateutil import parse
+from bdateutil.bcalendar import bday_index, compile_holidays, count_bdays
+from bdateutil.bcalendar import default_weekmask, next_workday_table
 
 
 BDAILY = 8
+BMONTHLY = 9
+BQUARTERLY = 10
+BYEARLY = 11
+
+BFREQNAMES = {
+    BDAILY: "BDAILY",
+    BMONTHLY: "BMONTHLY",
+    BQUARTERLY: "BQUARTERLY",
+    BYEARLY: "BYEARLY",
+}
+
+# Length in months of the periods of the business period frequencies
+_PERIOD_MONTHS = {BMONTHLY: 1, BQUARTERLY: 3, BYEARLY: 12}
+
+# Seconds between occurrences of rules without by* arguments
+_LINEAR_SECONDS = {
+    WEEKLY: 604800,
+    DAILY: 86400,
+    HOURLY: 3600,
+    MINUTELY: 60,
+    SECONDLY: 1,
+}
+
+_MAXYEAR = _date.max.year
+_MAXORDINAL = _date.max.toordinal()
+
+
+def _bday_filter(mask, holidays):
+    def isbday(dt):
+        ordinal = dt.toordinal()
+        return mask >> ((ordinal - 1) % 7) & 1 and not holidays.contains_ordinal(
+            ordinal
+        )
+
+    return isbday
 
 
 class rrule(rrulebase):
-    def __init__(self, freq, **kwargs):
-        if "dtstart" in kwargs:
+    def __init__(self, freq, holidays=None, calendar=None, **kwargs):
+        if kwargs.get("dtstart") is not None:
             kwargs["dtstart"] = parse(kwargs["dtstart"])
-        if "until" in kwargs:
+        if kwargs.get("until") is not None:
             kwargs["until"] = parse(kwargs["until"])
-        if freq == BDAILY:
-            rrulebase.__init__(self, DAILY, **kwargs)
-            self._bdaily = True
-            if self._count:
-                self._count *= 2
-        else:
-            rrulebase.__init__(self, freq, **kwargs)
-            self._bdaily = False
+        self._holidays = holidays
+        self._calendar = calendar
+        self._bfreq = freq if freq in BFREQNAMES else None
+        self._bdaily = freq == BDAILY
+        rrulebase.__init__(self, DAILY if self._bfreq else freq, **kwargs)
+        if freq in _PERIOD_MONTHS and set(self._original_rule) - {"bysetpos"}:
+            raise ValueError(
+                "%s only supports bysetpos among the by* arguments" % BFREQNAMES[freq]
+            )
 
     def _iter(self):
+        if self._bfreq in _PERIOD_MONTHS:
+            gen = self._iter_periods()
+        elif not self._bdaily:
+            gen = rrulebase._iter(self)
+        elif self._is_native():
+            gen = self._iter_bdays()
+        else:
+            gen = self._iter_filtered()
+        for i in gen:
+            yield i
+
+    def _is_native(self):
+        # Plain BDAILY rules are the business days from dtstart onwards,
+        # so they can be iterated, indexed and counted from the calendar
+        return self._bdaily and self._interval == 1 and not self._original_rule
+
+    def _bday_tables(self):
+        if self._calendar is not None:
+            return self._calendar.weekmask, self._calendar.holiday_set
+        return default_weekmask(), compile_holidays(self._holidays)
+
+    def _iter_bdays(self):
+        # Plain BDAILY rules step straight from one workday to the next
+        # with the weekmask table and skip holidays by ordinal lookup
+        mask, holidays = self._bday_tables()
+        step = next_workday_table(mask)
+        dtstart = self._dtstart
+        until = self._until
+        count = self._count
+        start = dtstart.toordinal()
+        # Compile the holidays of the whole expansion up front when its
+        # end is known
+        if until is not None:
+            end = until.toordinal() + 1
+        elif count is not None:
+            end = start + count * 8 // bin(mask).count("1") + 14
+        else:
+            end = None
+        if holidays and end is not None:
+            holidays.ensure(start, min(end, _MAXORDINAL + 1))
+        ordinal = start
+        if not mask >> ((ordinal - 1) % 7) & 1:
+            ordinal += step[(ordinal - 1) % 7]
+        total = 0
+        while ordinal <= _MAXORDINAL:
+            if not holidays.contains_ordinal(ordinal):
+                if count is not None and total >= count:
+                    break
+                dt = dtstart + _timedelta(days=ordinal - start)
+                if until and dt > until:
+                    break
+                total += 1
+                yield dt
+            ordinal += step[(ordinal - 1) % 7]
+        self._len = total
+
+    def _iter_periods(self):
+        # One or more business days per month, quarter or year, read from
+        # the business day index by their position within the period:
+        # bysetpos=1 is the first business day, -1 (the default) the last
+        months = _PERIOD_MONTHS[self._bfreq]
+        step = months * self._interval
+        positions = [n - 1 if n > 0 else n for n in self._bysetpos or (-1,)]
+        index = self._bday_index()
+        dtstart = self._dtstart
+        until = self._until
+        count = self._count
+        start = dtstart.toordinal()
+        year = dtstart.year
+        month = dtstart.month - (dtstart.month - 1) % months
         total = 0
-        for i in rrulebase._iter(self):
-            if self._bdaily:
-                if i.weekday() < 5:
-                    total += 1
-                    if total > self._count / 2:
-                        return
-                    yield i
+        while year <= _MAXYEAR:
+            first = _date(year, month, 1).toordinal()
+            years, rem = divmod(month - 1 + months, 12)
+            if year + years > _MAXYEAR:
+                end = _MAXORDINAL + 1
             else:
+                end = _date(year + years, rem + 1, 1).toordinal()
+            ordinals = set(index.nth_between(first, end, n) for n in positions)
+            ordinals.discard(None)
+            for ordinal in sorted(ordinals):
+                if ordinal < start:
+                    continue
+                if count is not None and total >= count:
+                    self._len = total
+                    return
+                dt = dtstart + _timedelta(days=ordinal - start)
+                if until and dt > until:
+                    self._len = total
+                    return
+                total += 1
+                yield dt
+            years, rem = divmod(month - 1 + step, 12)
+            year += years
+            month = rem + 1
+        self._len = total
+
+    def _bday_index(self):
+        if self._calendar is not None:
+            return self._calendar.index
+        mask, holidays = self._bday_tables()
+        return bday_index(holidays, mask)
+
+    def _bday_len(self):
+        """Return the number of occurrences of a plain BDAILY rule from the
+        closed-form business day count, without iterating."""
+        mask, holidays = self._bday_tables()
+        dtstart = self._dtstart
+        start = dtstart.toordinal()
+        end = _MAXORDINAL + 1
+        if self._until is not None:
+            until = self._until
+            last = until.toordinal()
+            if last >= start and dtstart + _timedelta(days=last - start) > until:
+                last -= 1
+            end = min(last + 1, end)
+        if self._count is not None:
+            try:
+                last = self._bday_index().nth(start, self._count - 1)
+            except OverflowError:
+                pass
+            else:
+                if last < end or not self._count:
+                    return self._count
+        if end <= start:
+            return 0
+        total = count_bdays(start, end, mask, holidays)
+        if self._count is not None:
+            total = min(total, self._count)
+        return total
+
+    def _bday_at(self, n, index):
+        start = self._dtstart.toordinal()
+        ordinal = index.nth(start, n)
+        return self._dtstart + _timedelta(days=ordinal - start)
+
+    def _bday_get(self, n, index):
+        """Return occurrence ``n`` of a plain BDAILY rule, or None past its
+        end."""
+        if n < 0 or self._count is not None and n >= self._count:
+            return None
+        try:
+            ret = self._bday_at(n, index)
+        except OverflowError:
+            return None
+        if self._until is not None and ret > self._until:
+            return None
+        return ret
+
+    def _bday_rank(self, dt, inc, index):
+        """Return the number of occurrences before ``dt``, or up to and
+        including it if ``inc``. The business day count up to the day of
+        ``dt`` comes from the index, and comparing the neighbouring
+        occurrences with ``dt`` settles the time of day and time zones."""
+
+        def below(x):
+            return x <= dt if inc else x < dt
+
+        start = self._dtstart.toordinal()
+        end = min(dt.toordinal(), _MAXORDINAL + 1)
+        n = index.count(start, end)
+        if n and self._bday_get(n - 1, index) is None:
+            n = self.count()
+        while n and not below(self._bday_get(n - 1, index)):
+            n -= 1
+        while True:
+            ret = self._bday_get(n, index)
+            if ret is None or not below(ret):
+                return n
+            n += 1
+
+    def __getitem__(self, item):
+        if self._cache_complete or not self._is_native():
+            return rrulebase.__getitem__(self, item)
+        index = self._bday_index()
+        if isinstance(item, slice):
+            indices = range(*item.indices(self.count()))
+            return [self._bday_at(n, index) for n in indices]
+        if item < 0:
+            item += self.count()
+        ret = self._bday_get(item, index)
+        if ret is None:
+            raise IndexError
+        return ret
+
+    def __contains__(self, item):
+        if self._cache_complete or not self._is_native():
+            return rrulebase.__contains__(self, item)
+        index = self._bday_index()
+        return self._bday_get(self._bday_rank(item, False, index), index) == item
+
+    def before(self, dt, inc=False):
+        if self._cache_complete or not self._is_native():
+            return rrulebase.before(self, dt, inc)
+        index = self._bday_index()
+        return self._bday_get(self._bday_rank(dt, inc, index) - 1, index)
+
+    def after(self, dt, inc=False):
+        if self._cache_complete or not self._is_native():
+            return rrulebase.after(self, dt, inc)
+        index = self._bday_index()
+        return self._bday_get(self._bday_rank(dt, not inc, index), index)
+
+    def between(self, after, before, inc=False, count=1):
+        if self._cache_complete or not self._is_native():
+            return rrulebase.between(self, after, before, inc, count)
+        index = self._bday_index()
+        first = self._bday_rank(after, not inc, index)
+        last = self._bday_rank(before, inc, index)
+        return [self._bday_at(n, index) for n in range(first, last)]
+
+    def count(self):
+        if self._len is None and self._is_native():
+            self._len = self._bday_len()
+        return rrulebase.count(self)
+
+    def __str__(self):
+        ret = rrulebase.__str__(self)
+        if self._bfreq:
+            ret = ret.replace("FREQ=DAILY", "FREQ=" + BFREQNAMES[self._bfreq], 1)
+        return ret
+
+    def replace(self, **kwargs):
+        """Return a copy of this rule with the given arguments replaced,
+        keeping its business frequency, holidays and calendar."""
+        new_kwargs = dict(
+            self._state_kwargs(), holidays=self._holidays, calendar=self._calendar
+        )
+        new_kwargs.update(kwargs)
+        return rrule(**new_kwargs)
+
+    def _state_kwargs(self):
+        kwargs = {
+            "freq": self._bfreq or self._freq,
+            "dtstart": self._dtstart,
+            "interval": self._interval,
+            "wkst": self._wkst,
+            "count": self._count,
+            "until": self._until,
+            "cache": self._cache is not None,
+        }
+        kwargs.update(self._original_rule)
+        return kwargs
+
+    def __reduce__(self):
+        # Pickle the constructor arguments rather than the expanded option
+        # sets and any cache, which holds a lock and a generator
+        byrules = []
+        for name, value in sorted(self._original_rule.items()):
+            if name == "byweekday" and value is not None:
+                value = tuple((wd.weekday, wd.n) for wd in value)
+            byrules.append((name, value))
+        state = (
+            self._bfreq or self._freq,
+            self._dtstart,
+            self._interval,
+            self._wkst,
+            self._count,
+            self._until,
+            self._cache is not None,
+            tuple(byrules),
+        )
+        return _restore_rrule, (state, self._holidays, self._calendar)
+
+    def iter_batches(self, size=65536, unit="s"):
+        """Yield the occurrences as ``datetime64[unit]`` arrays of at most
+        ``size`` items each, without creating a datetime per occurrence
+        where the frequency allows: plain BDAILY rules are sliced from the
+        business day index and rules without by* arguments from WEEKLY to
+        SECONDLY are arithmetic progressions. Other rules are converted
+        batch by batch. Time zone aware occurrences are converted to UTC.
+        Requires numpy."""
+        _arrays._require_numpy()
+        if size < 1:
+            raise ValueError("size must be positive")
+        dtype = "datetime64[%s]" % unit
+        if self._dtstart.tzinfo is not None or self._cache_complete:
+            batches = self._batches_iter(size)
+        elif self._is_native():
+            batches = self._batches_bdays(size)
+        elif (
+            not self._bfreq
+            and self._freq in _LINEAR_SECONDS
+            and all(v is None for v in self._original_rule.values())
+        ):
+            batches = self._batches_linear(size)
+        else:
+            batches = self._batches_iter(size)
+        for batch in batches:
+            yield batch.astype(dtype)
+
+    def to_array(self, unit="s"):
+        """Return every occurrence as one ``datetime64[unit]`` array, see
+        :meth:`iter_batches`."""
+        batches = list(self.iter_batches(unit=unit))
+        if not batches:
+            return _arrays.np.empty(0, dtype="datetime64[%s]" % unit)
+        return _arrays.np.concatenate(batches)
+
+    def _batches_iter(self, size):
+        np = _arrays.np
+        gen = iter(self)
+        while True:
+            batch = list(_islice(gen, size))
+            if not batch:
+                return
+            if batch[0].tzinfo is not None:
+                utc = _timezone.utc
+                batch = [dt.astimezone(utc).replace(tzinfo=None) for dt in batch]
+            yield np.array(batch, dtype="datetime64[us]")
+
+    def _batches_linear(self, size):
+        np = _arrays.np
+        dtstart = self._dtstart
+        step = _LINEAR_SECONDS[self._freq] * self._interval
+        last = _datetime.max.replace(microsecond=0)
+        if self._until is not None:
+            last = min(last, self._until)
+        total = 0
+        if last >= dtstart:
+            total = int((last - dtstart).total_seconds()) // step + 1
+        if self._count is not None:
+            total = min(total, self._count)
+        start = np.datetime64(dtstart, "s")
+        for k in range(0, total, size):
+            offsets = np.arange(k, min(k + size, total), dtype=np.int64) * step
+            yield start + offsets.astype("timedelta64[s]")
+
+    def _batches_bdays(self, size):
+        np = _arrays.np
+        index = self._bday_index()
+        dtstart = self._dtstart
+        start = dtstart.toordinal()
+        last = _MAXORDINAL
+        if self._until is not None:
+            until = self._until
+            last = min(last, until.toordinal())
+            if dtstart + _timedelta(days=last - start) > until:
+                last -= 1
+        time = np.timedelta64(
+            dtstart.hour * 3600 + dtstart.minute * 60 + dtstart.second, "s"
+        )
+        count = self._count
+        first_year = dtstart.year
+        last_year = first_year
+        k = 0
+        while count is None or k < count:
+            n = size if count is None else min(size, count - k)
+            while True:
+                offset, cum, bdays = index.covering(first_year, last_year)
+                i = cum[start - offset] + k
+                if i + n <= len(bdays) or last_year >= _MAXYEAR:
+                    break
+                last_year += max(last_year - first_year, 1)
+            ordinals = np.frombuffer(bdays, dtype=np.intc)[i : i + n]
+            ordinals = ordinals[: np.searchsorted(ordinals, last, side="right")]
+            if not len(ordinals):
+                return
+            days = (ordinals.astype(np.int64) - _arrays.EPOCH_ORDINAL).astype(
+                "datetime64[D]"
+            )
+            yield days.astype("datetime64[s]") + time
+            k += len(ordinals)
+            if len(ordinals) < n:
+                return
+
+    def _iter_filtered(self):
+        # Rules with an interval or by* restrictions keep the full DAILY
+        # semantics; count applies to the business days actually yielded
+        isbday = _bday_filter(*self._bday_tables())
+        daily = rrulebase.replace(self, count=None, cache=False)
+        total = 0
+        count = self._count
+        for i in daily._iter():
+            if isbday(i):
+                if count is not None and total >= count:
+                    break
+                total += 1
                 yield i
-        return
+        self._len = total
+
+
+class rruleset(rrulesetbase):
+    """dateutil's rruleset with business day exclusions.
+
+    Besides exrule and exdate, occurrences can be excluded by whole ranges
+    of days with :meth:`exrange`, by ``holidays``, or by every non-business
+    day of a ``calendar``. Ranges are merged into a sorted interval index
+    that is searched by bisection, so thousands of blackout periods cost
+    no more per occurrence than one.
+    """
+
+    def __init__(self, cache=False, holidays=None, calendar=None):
+        rrulesetbase.__init__(self, cache)
+        self._holidays = holidays
+        self._calendar = calendar
+        self._exrange = []
+        self._exindex = None
+
+    @_invalidates_cache
+    def exrange(self, start, end=None):
+        """Exclude every occurrence falling on the days from ``start`` to
+        ``end`` inclusive, or on the day of ``start`` alone."""
+        start = parse(start).toordinal()
+        end = start if end is None else parse(end).toordinal()
+        if end < start:
+            raise ValueError("exrange end is before its start")
+        self._exrange.append((start, end))
+        self._exindex = None
+
+    def __reduce__(self):
+        state = (
+            self._cache is not None,
+            self._rrule,
+            self._rdate,
+            self._exrule,
+            self._exdate,
+            self._exrange,
+        )
+        return _restore_rruleset, (state, self._holidays, self._calendar)
+
+    def _exclusions(self):
+        """Return the merged exclusion ranges as sorted lists of first and
+        last day ordinals."""
+        if self._exindex is None:
+            starts, ends = [], []
+            for start, end in sorted(self._exrange):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._exindex = (starts, ends)
+        return self._exindex
+
+    def _iter(self):
+        starts, ends = self._exclusions()
+        mask = holidays = None
+        if self._calendar is not None:
+            mask = self._calendar.weekmask
+            holidays = self._calendar.holiday_set
+        elif self._holidays is not None:
+            holidays = compile_holidays(self._holidays)
+        if not starts and holidays is None:
+            for dt in rrulesetbase._iter(self):
+                yield dt
+            return
+        total = 0
+        for dt in rrulesetbase._iter(self):
+            ordinal = dt.toordinal()
+            i = _bisect_right(starts, ordinal) - 1
+            if i >= 0 and ordinal <= ends[i]:
+                continue
+            if holidays is not None:
+                if mask is not None and not mask >> ((ordinal - 1) % 7) & 1:
+                    continue
+                if holidays.contains_ordinal(ordinal):
+                    continue
+            total += 1
+            yield dt
+        self._len = total
+
+
+def _restore_rrule(state, holidays, calendar):
+    freq, dtstart, interval, wkst, count, until, cache, byrules = state
+    kwargs = dict(byrules)
+    if kwargs.get("byweekday") is not None:
+        kwargs["byweekday"] = tuple(weekday(*wd) for wd in kwargs["byweekday"])
+    return rrule(
+        freq,
+        holidays=holidays,
+        calendar=calendar,
+        dtstart=dtstart,
+        interval=interval,
+        wkst=wkst,
+        count=count,
+        until=until,
+        cache=cache,
+        **kwargs
+    )
+
+
+def _restore_rruleset(state, holidays, calendar):
+    cache, rrules, rdates, exrules, exdates, exranges = state
+    ret = rruleset(cache=cache, holidays=holidays, calendar=calendar)
+    ret._rrule.extend(rrules)
+    ret._rdate.extend(rdates)
+    ret._exrule.extend(exrules)
+    ret._exdate.extend(exdates)
+    ret._exrange.extend(exranges)
+    return ret
+
+
+class _RulePickler(_pickle.Pickler):
+    def __init__(self, file, calendars):
+        _pickle.Pickler.__init__(self, file, _pickle.HIGHEST_PROTOCOL)
+        self._keys = dict((id(cal), key) for key, cal in calendars.items())
+        self._calendars = calendars
+
+    def persistent_id(self, obj):
+        key = self._keys.get(id(obj))
+        if key is not None and self._calendars[key] is obj:
+            return key
+        return None
+
+
+class _RuleUnpickler(_pickle.Unpickler):
+    def __init__(self, file, calendars):
+        _pickle.Unpickler.__init__(self, file)
+        self._calendars = calendars
+
+    def persistent_load(self, key):
+        try:
+            return self._calendars[key]
+        except KeyError:
+            raise ValueError("unknown calendar %r" % (key,))
+
+
+def dumps_rule(rule, calendars=None):
+    """Serialize an :class:`rrule` or :class:`rruleset` to bytes.
+
+    Rules are stored as their constructor arguments, without the expanded
+    option sets or any cache. ``calendars`` maps IDs to the calendars and
+    holiday containers that the reading side already has; those are
+    written as their ID instead of their contents. Other calendars and
+    holidays are embedded, with their compiled holidays.
+    """
+    buf = _io.BytesIO()
+    _RulePickler(buf, calendars or {}).dump(rule)
+    return buf.getvalue()
+
+
+def loads_rule(data, calendars=None):
+    """Rebuild a rule serialized by :func:`dumps_rule`. ``calendars`` maps
+    the IDs it references to calendars or holiday containers, and raises
+    ValueError for a missing ID. Only load data from trusted sources: like
+    :mod:`pickle`, loading can run arbitrary code."""
+    return _RuleUnpickler(_io.BytesIO(data), calendars or {}).load()
+
+
+CacheInfo = _namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+
+def _copy_set(rset):
+    ret = rruleset(
+        cache=rset._cache is not None,
+        holidays=getattr(rset, "_holidays", None),
+        calendar=getattr(rset, "_calendar", None),
+    )
+    ret._rrule.extend(rset._rrule)
+    ret._rdate.extend(rset._rdate)
+    ret._exrule.extend(rset._exrule)
+    ret._exdate.extend(rset._exdate)
+    ret._exrange.extend(getattr(rset, "_exrange", ()))
+    return ret
 
 
 # dateutil.rrule.rrulestr returns a dateutil.rrule.rrule object
 # RRuleTest.testStrType() from the original dateutil tests fails
 # because dateutil.rrule.rrule is not an instance of bdateutil.rrule.rrule
-# so we need to redefine rrulestr to return a bdateutil rrule object
+# so we need to redefine rrulestr to return a bdateutil rrule object, which
+# also lets it parse the business frequencies
 class _rrulestr(rrulestrbase):
-    def _parse_rfc_rrule(self, line, **kwargs):
-        ret = rrulestrbase._parse_rfc_rrule(self, line, **kwargs)
-        ret.__class__ = rrule
-        ret._bdaily = False
+    """Parse RFC 5545 recurrence text into bdateutil rules.
+
+    Results are memoized in a thread-safe LRU cache of ``maxsize`` entries
+    keyed by the text, the keyword options and the identity of
+    ``holidays`` and ``calendar``; ``maxsize=0`` disables it. Calls with
+    unhashable options, such as a ``tzinfos`` dict, and calls without a
+    DTSTART or ``dtstart``, whose rules start now, are never cached.
+    Cached rrule objects are shared between callers, which is safe as
+    rrules are immutable; a cached rruleset is copied on every hit since
+    its methods add to it.
+    """
+
+    _freq_map = dict(
+        rrulestrbase._freq_map, **dict((v, k) for k, v in BFREQNAMES.items())
+    )
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._cache = _OrderedDict()
+        self._lock = _threading.Lock()
+        self._hits = self._misses = 0
+
+    def __call__(self, s, holidays=None, calendar=None, **kwargs):
+        key = (s, id(holidays), id(calendar), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if kwargs.get("dtstart") is None and "DTSTART" not in s.upper():
+            # The rules start at the time they are built
+            key = None
+        if key is not None and self.maxsize:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry[0] is holidays and entry[1] is calendar:
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    ret = entry[2]
+                    return _copy_set(ret) if isinstance(ret, rrulesetbase) else ret
+                self._misses += 1
+        else:
+            with self._lock:
+                self._misses += 1
+        ret = rrulestrbase.__call__(self, s, **kwargs)
+        if isinstance(ret, rrulesetbase):
+            ret = _copy_set(ret)
+        rules = ret._rrule + ret._exrule if isinstance(ret, rruleset) else [ret]
+        for rule in rules:
+            rule._holidays = holidays
+            rule._calendar = calendar
+        if key is not None and self.maxsize:
+            with self._lock:
+                self._cache[key] = (holidays, calendar, ret)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+            if isinstance(ret, rruleset):
+                return _copy_set(ret)
         return ret
 
+    def cache_info(self):
+        """Return the hits, misses, maxsize and current size of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._cache))
+
+    def cache_clear(self):
+        """Empty the cache and reset its statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+    def _parse_rfc_rrule(
+        self, line, dtstart=None, cache=False, ignoretz=False, tzinfos=None
+    ):
+        if line.find(":") != -1:
+            name, value = line.split(":")
+            if name != "RRULE":
+                raise ValueError("unknown parameter name")
+        else:
+            value = line
+        rrkwargs = {}
+        for pair in value.split(";"):
+            name, value = pair.split("=")
+            name = name.upper()
+            value = value.upper()
+            try:
+                getattr(self, "_handle_" + name)(
+                    rrkwargs, name, value, ignoretz=ignoretz, tzinfos=tzinfos
+                )
+            except AttributeError:
+                raise ValueError("unknown parameter '%s'" % name)
+            except (KeyError, ValueError):
+                raise ValueError("invalid '%s': %s" % (name, value))
+        return rrule(dtstart=dtstart, cache=cache, **rrkwargs)
+
 
 rrulestr = _rrulestr()
@@ -0,0 +1,266 @@
+#  bdateutil
+#  ---------
+#  Adds business day logic and improved data type flexibility to
+#  python-dateutil. 100% backwards compatible with python-dateutil,
+#  simply replace dateutil imports with bdateutil.
+#
+#  Author:  ryanss <ryanssdev@icloud.com>
+#  Website: https://github.com/ryanss/bdateutil
+#  License: MIT (see LICENSE file)
+
+"""Benchmarks for the bdateutil hot paths.
+
+Every benchmark is timed with :mod:`timeit` and reported as operations per
+second. Business day benchmarks run once without holidays and once with
+``holidays.US()``. Results can be saved as JSON and compared against an
+earlier run::
+
+    $ python benchmarks.py -o before.json
+    $ git checkout my-branch
+    $ python benchmarks.py -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import time as _time
+import timeit
+from datetime import date, datetime
+
+import dateutil
+import holidays
+
+import bdateutil
+from bdateutil import isbday, parse, relativedelta
+from bdateutil.rrule import BDAILY, rrule
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+CALENDARS = {"none": (), "us": holidays.US()}
+
+BENCHMARKS = []
+
+
+def benchmark(name, ops=1, calendars=False):
+    """Register ``func(holidays)`` as a benchmark. ``ops`` is the number of
+    operations a single call performs, used to report throughput, or None
+    to count the items the call returns."""
+
+    def decorator(func):
+        for cal in CALENDARS if calendars else (None,):
+            BENCHMARKS.append(
+                (name if cal is None else name + "[%s]" % cal, ops, func, cal)
+            )
+        return func
+
+    return decorator
+
+
+@benchmark("parse.iso_date")
+def bench_parse_iso_date(hols):
+    return lambda: parse("2014-07-03")
+
+
+@benchmark("parse.iso_datetime")
+def bench_parse_iso_datetime(hols):
+    return lambda: parse("2014-07-03T10:30:15.123456+02:00")
+
+
+@benchmark("parse.freeform")
+def bench_parse_freeform(hols):
+    return lambda: parse("Thu, July 3rd 2014 10:30 AM")
+
+
+@benchmark("parse.timestamp")
+def bench_parse_timestamp(hols):
+    return lambda: parse(1404383415)
+
+
+@benchmark("isbday.date", calendars=True)
+def bench_isbday_date(hols):
+    d = date(2014, 7, 4)
+    return lambda: isbday(d, holidays=hols)
+
+
+@benchmark("isbday.string", calendars=True)
+def bench_isbday_string(hols):
+    return lambda: isbday("2014-07-04", holidays=hols)
+
+
+@benchmark("relativedelta.bdays+5", calendars=True)
+def bench_bdays_small(hols):
+    d = date(2014, 7, 3)
+    delta = relativedelta(bdays=5, holidays=hols)
+    return lambda: d + delta
+
+
+@benchmark("relativedelta.bdays-5", calendars=True)
+def bench_bdays_small_neg(hols):
+    d = date(2014, 7, 3)
+    delta = relativedelta(bdays=-5, holidays=hols)
+    return lambda: d + delta
+
+
+@benchmark("relativedelta.bdays+2500", calendars=True)
+def bench_bdays_large(hols):
+    d = date(2014, 7, 3)
+    delta = relativedelta(bdays=2500, holidays=hols)
+    return lambda: d + delta
+
+
+@benchmark("relativedelta.bdays-2500", calendars=True)
+def bench_bdays_large_neg(hols):
+    d = date(2014, 7, 3)
+    delta = relativedelta(bdays=-2500, holidays=hols)
+    return lambda: d + delta
+
+
+@benchmark("relativedelta.count_1m", calendars=True)
+def bench_count_short(hols):
+    d1, d2 = date(2014, 7, 31), date(2014, 7, 1)
+    return lambda: relativedelta(d1, d2, holidays=hols)
+
+
+@benchmark("relativedelta.count_30y", calendars=True)
+def bench_count_long(hols):
+    d1, d2 = date(2044, 7, 1), date(2014, 7, 1)
+    return lambda: relativedelta(d1, d2, holidays=hols)
+
+
+@benchmark("rrule.bdaily_260", ops=None, calendars=True)
+def bench_rrule_bdaily(hols):
+    start = datetime(2014, 1, 1)
+    return lambda: list(rrule(BDAILY, count=260, dtstart=start, holidays=hols))
+
+
+@benchmark("rrule.bdaily_until_5y", ops=None, calendars=True)
+def bench_rrule_bdaily_until(hols):
+    start, until = datetime(2014, 1, 1), datetime(2018, 12, 31)
+    return lambda: list(rrule(BDAILY, dtstart=start, until=until, holidays=hols))
+
+
+@benchmark("date.from_string")
+def bench_date_from_string(hols):
+    return lambda: bdateutil.date("2014-07-03")
+
+
+@benchmark("datetime.from_string")
+def bench_datetime_from_string(hols):
+    return lambda: bdateutil.datetime("2014-07-03 10:30:15")
+
+
+if np is not None:
+
+    @benchmark("arrays.isbday_1m", ops=10**6, calendars=True)
+    def bench_isbday_array(hols):
+        days = np.datetime64("1990-01-01") + np.arange(10**6) % 18250
+        return lambda: bdateutil.isbday_array(days, holidays=hols)
+
+    @benchmark("arrays.offset_1m", ops=10**6, calendars=True)
+    def bench_offset_array(hols):
+        days = np.datetime64("1990-01-01") + np.arange(10**6) % 18250
+        return lambda: bdateutil.bday_offset_array(days, 2, holidays=hols)
+
+    @benchmark("arrays.count_1m", ops=10**6, calendars=True)
+    def bench_count_array(hols):
+        days = np.datetime64("1990-01-01") + np.arange(10**6) % 18250
+        return lambda: bdateutil.bday_count_array(days + 30, days, holidays=hols)
+
+
+def run(name, ops, func, cal, repeat, min_time):
+    stmt = func(CALENDARS[cal] if cal is not None else ())
+    ret = stmt()  # warm up lazily built indexes and caches
+    if ops is None:
+        ops = len(ret)
+    timer = timeit.Timer(stmt)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    timings = [elapsed] + timer.repeat(repeat - 1, number)
+    best = min(timings) / number
+    median = sorted(timings)[len(timings) // 2] / number
+    return {
+        "name": name,
+        "loops": number,
+        "best": best,
+        "median": median,
+        "ops_per_sec": ops / best,
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode().strip()
+
+
+def format_rate(rate):
+    for unit, scale in (("M", 1e6), ("k", 1e3)):
+        if rate >= scale:
+            return "%.2f%s" % (rate / scale, unit)
+    return "%.1f" % rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="save results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("-k", dest="pattern", help="only run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = dict((b["name"], b) for b in json.load(f)["benchmarks"])
+
+    results = []
+    for name, ops, func, cal in BENCHMARKS:
+        if args.pattern and not re.search(args.pattern, name):
+            continue
+        result = run(name, ops, func, cal, args.repeat, args.min_time)
+        results.append(result)
+        line = "%-36s %12s ops/s %12.3f us" % (
+            name,
+            format_rate(result["ops_per_sec"]),
+            result["best"] * 1e6,
+        )
+        if name in baseline:
+            line += "  %6.2fx" % (result["ops_per_sec"] / baseline[name]["ops_per_sec"])
+        print(line)
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "revision": git_revision(),
+                    "timestamp": _time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "dateutil": dateutil.__version__,
+                    "holidays": holidays.__version__,
+                    "benchmarks": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
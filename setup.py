@@ -29,6 +29,7 @@ setup(
     ),
     long_description=open("README.rst").read(),
     install_requires=["python-dateutil", "holidays"],
+    extras_require={"numpy": ["numpy"]},
     platforms="any",
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -9,11 +9,21 @@
 #  License: MIT (see LICENSE file)
 
 
+import io
+import pickle
 import unittest
-from datetime import date, datetime
+from itertools import islice
+from datetime import date, datetime, time, timedelta, timezone
 
 import holidays
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from dateutil import parser as dateutil_parser
+from dateutil import tz as dateutil_tz
 from dateutil.tz import datetime_ambiguous, datetime_exists
 from test_dateutil_28.test_easter import *
 from test_dateutil_28.test_imports import *
@@ -22,9 +32,14 @@ from test_dateutil_28.test_relativedelta import *
 from test_dateutil_28.test_rrule import *
 from test_dateutil_28.test_tz import *
 
-from bdateutil import isbday
+import bdateutil
+from bdateutil import isbday, isbday_many
+from bdateutil import BusinessCalendar
+from bdateutil import expand_merged, expand_rule, expand_rules
+from bdateutil import bday_count_array, bday_offset_array, isbday_array
+from bdateutil.bcalendar import compile_holidays, next_workday_table
 from bdateutil import relativedelta
-from bdateutil import parse
+from bdateutil import parse, parse_many, parse_stream, parserinfo
 from bdateutil.rrule import *
 
 from testdateutil import *
@@ -36,6 +51,231 @@ class TestIsBday(unittest.TestCase):
         self.assertTrue(isbday(date(2014, 1, 1)))
         self.assertFalse(isbday(date(2014, 1, 1), holidays=holidays.US()))
 
+    def test_isbday_holiday_list(self):
+        hols = [date(2014, 1, 2)]
+        self.assertFalse(isbday(datetime(2014, 1, 2, 12), holidays=hols))
+        self.assertTrue(isbday("2014-01-03", holidays=hols))
+        hols.append(date(2014, 1, 3))
+        self.assertFalse(isbday("2014-01-03", holidays=hols))
+
+    def test_isbday_many(self):
+        dts = ["2014-01-03", date(2014, 1, 4), datetime(2014, 7, 4, 9), 1388577600]
+        self.assertEqual(list(isbday_many(dts)), [True, False, True, True])
+        self.assertEqual(
+            list(isbday_many(iter(dts), holidays=holidays.US())),
+            [True, False, False, False],
+        )
+        cal = BusinessCalendar(workdays=(6, 0, 1, 2, 3))
+        self.assertEqual(
+            list(isbday_many(dts, calendar=cal)), [isbday(d, calendar=cal) for d in dts]
+        )
+        self.assertEqual(list(isbday_many([])), [])
+
+
+class TestHolidaySet(unittest.TestCase):
+    def test_compile(self):
+        us = holidays.US()
+        hs = compile_holidays(us)
+        self.assertIs(compile_holidays(us), hs)
+        self.assertIs(compile_holidays(hs), hs)
+        self.assertIn(date(2014, 7, 4), hs)
+        self.assertIn(datetime(1990, 12, 25, 8), hs)
+        self.assertNotIn(date(2014, 7, 3), hs)
+        self.assertEqual(
+            list(
+                hs.ordinals(date(2014, 1, 1).toordinal(), date(2015, 1, 1).toordinal())
+            ),
+            sorted(d.toordinal() for d in us if d.year == 2014),
+        )
+
+    def test_compile_plain(self):
+        hs = compile_holidays(["2014-01-02", date(2014, 1, 1), datetime(2014, 1, 3)])
+        self.assertEqual(
+            list(hs.ordinals(0, date(2015, 1, 1).toordinal())),
+            [date(2014, 1, d).toordinal() for d in (1, 2, 3)],
+        )
+        self.assertFalse(compile_holidays(()))
+        self.assertFalse(compile_holidays(None))
+
+
+class TestBusinessCalendar(unittest.TestCase):
+    def test_calendar(self):
+        cal = BusinessCalendar(workdays=(6, 0, 1, 2, 3), holidays=holidays.US())
+        self.assertEqual(cal.workdays, (0, 1, 2, 3, 6))
+        self.assertEqual(cal.btstart, time(9, 0))
+        self.assertTrue(isbday(date(2014, 1, 5), calendar=cal))
+        self.assertFalse(isbday(date(2014, 1, 3), calendar=cal))
+        self.assertFalse(isbday(date(2014, 1, 1), calendar=cal))
+        self.assertEqual(cal.offset(date(2014, 1, 2), 1), date(2014, 1, 5))
+        self.assertEqual(
+            date(2014, 1, 2) + relativedelta(bdays=2, calendar=cal), date(2014, 1, 6)
+        )
+        self.assertEqual(
+            date(2014, 1, 6) - relativedelta(bdays=2, calendar=cal), date(2014, 1, 2)
+        )
+        self.assertEqual(
+            relativedelta(date(2014, 1, 6), date(2014, 1, 1), calendar=cal).bdays, 3
+        )
+        self.assertEqual(
+            list(rrule(BDAILY, count=3, dtstart="2014-12-24", calendar=cal)),
+            [datetime(2014, 12, 24), datetime(2014, 12, 28), datetime(2014, 12, 29)],
+        )
+
+    def test_pickle(self):
+        cal = BusinessCalendar(workdays=(6, 0, 1, 2, 3), holidays=holidays.US())
+        cal.offset(date(2014, 1, 2), 300)
+        copy = pickle.loads(pickle.dumps(cal))
+        self.assertEqual(copy.workdays, cal.workdays)
+        start, end = date(2014, 1, 1).toordinal(), date(2016, 1, 1).toordinal()
+        self.assertEqual(
+            copy.holiday_set.ordinals(start, end), cal.holiday_set.ordinals(start, end)
+        )
+        self.assertEqual(
+            copy.offset(date(2014, 1, 2), 300), cal.offset(date(2014, 1, 2), 300)
+        )
+        self.assertFalse(copy.isbday(date(2030, 12, 25)))
+
+    def test_default(self):
+        cal = BusinessCalendar()
+        self.assertEqual(cal.workdays, (0, 1, 2, 3, 4))
+        self.assertEqual(cal.holidays, [])
+        self.assertRaises(ValueError, lambda: BusinessCalendar(workdays=()))
+
+
+class TestWorkdays(unittest.TestCase):
+    # Friday/Saturday weekend
+    def setUp(self):
+        self.workdays = bdateutil.WORKDAYS
+        bdateutil.WORKDAYS = (6, 0, 1, 2, 3)
+
+    def tearDown(self):
+        bdateutil.WORKDAYS = self.workdays
+
+    def test_next_workday_table(self):
+        self.assertEqual(next_workday_table(0b1001111), (1, 1, 1, 3, 2, 1, 1))
+        self.assertEqual(next_workday_table(0b0011111), (1, 1, 1, 1, 3, 2, 1))
+        self.assertRaises(ValueError, lambda: next_workday_table(0))
+
+    def test_isbday(self):
+        self.assertTrue(isbday(date(2014, 1, 5)))
+        self.assertFalse(isbday(date(2014, 1, 3)))
+
+    def test_relativedelta(self):
+        self.assertEqual(date(2014, 1, 2) + relativedelta(bdays=1), date(2014, 1, 5))
+        self.assertEqual(date(2014, 1, 5) + relativedelta(bdays=-1), date(2014, 1, 2))
+        self.assertEqual(relativedelta(date(2014, 1, 5), date(2014, 1, 2)).bdays, 1)
+        self.assertEqual(relativedelta(date(2014, 1, 4), date(2014, 1, 2)).bdays, 1)
+        self.assertEqual(relativedelta(date(2014, 1, 31), date(2014, 1, 1)).bdays, 22)
+
+    def test_rrule(self):
+        self.assertEqual(
+            list(rrule(BDAILY, count=3, dtstart="2014-01-02")),
+            [datetime(2014, 1, 2), datetime(2014, 1, 5), datetime(2014, 1, 6)],
+        )
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestArrays(unittest.TestCase):
+    def test_isbday_array(self):
+        us = holidays.US()
+        days = [date(2013, 12, 20) + timedelta(days=i) for i in range(30)]
+        expected = [isbday(d, holidays=us) for d in days]
+        self.assertEqual(isbday_array(days, holidays=us).tolist(), expected)
+        arr = np.array(days, dtype="datetime64[ns]") + np.timedelta64(13, "h")
+        self.assertEqual(isbday_array(arr, holidays=us).tolist(), expected)
+        self.assertEqual(
+            isbday_array(
+                np.array(["NaT", "2014-01-03"], dtype="datetime64[D]")
+            ).tolist(),
+            [False, True],
+        )
+        cal = BusinessCalendar(workdays=(6, 0, 1, 2, 3))
+        self.assertEqual(
+            isbday_array(["2014-01-03", "2014-01-05"], calendar=cal).tolist(),
+            [False, True],
+        )
+
+    def test_bday_offset_array(self):
+        us = holidays.US()
+        days = [date(2014, 6, 28) + timedelta(days=i) for i in range(10)]
+        for bdays in (0, 1, -1, 3, -3, 600):
+            self.assertEqual(
+                bday_offset_array(days, bdays, holidays=us).tolist(),
+                [d + relativedelta(bdays=bdays, holidays=us) for d in days],
+            )
+        offsets = np.arange(-5, 5)
+        self.assertEqual(
+            bday_offset_array(days, offsets, holidays=us).tolist(),
+            [
+                d + relativedelta(bdays=int(n), holidays=us)
+                for d, n in zip(days, offsets)
+            ],
+        )
+        arr = np.array(["2014-01-03T10:30", "NaT"], dtype="datetime64[ns]")
+        self.assertEqual(
+            bday_offset_array(arr, 1).astype("datetime64[m]").tolist(),
+            [datetime(2014, 1, 6, 10, 30), None],
+        )
+
+    def test_bday_offset_array_roll(self):
+        # Saturday 2014-05-31 and Monday 2014-06-02
+        days = ["2014-05-31", "2014-06-02"]
+        expected = {
+            "forward": [date(2014, 6, 3), date(2014, 6, 3)],
+            "backward": [date(2014, 6, 2), date(2014, 6, 3)],
+            "modifiedfollowing": [date(2014, 6, 2), date(2014, 6, 3)],
+            "modifiedpreceding": [date(2014, 6, 2), date(2014, 6, 3)],
+        }
+        for roll, dates in expected.items():
+            self.assertEqual(
+                bday_offset_array(days, 1, roll=roll).tolist(), dates, roll
+            )
+        self.assertEqual(
+            bday_offset_array(["2014-11-30"], 0, roll="modifiedfollowing").tolist(),
+            [date(2014, 11, 28)],
+        )
+        self.assertEqual(
+            bday_offset_array(["2014-06-01"], 0, roll="modifiedpreceding").tolist(),
+            [date(2014, 6, 2)],
+        )
+        self.assertRaises(ValueError, lambda: bday_offset_array(days, 1, roll="raise"))
+        self.assertRaises(ValueError, lambda: bday_offset_array(days, 1, roll="x"))
+
+    def test_bday_count_array(self):
+        us = holidays.US()
+        dt1 = [datetime(2014, 7, 7), datetime(2014, 1, 4), datetime(2014, 1, 7, 8)]
+        dt2 = [datetime(2014, 7, 3), datetime(2014, 1, 6), datetime(2014, 1, 3, 12)]
+        self.assertEqual(
+            bday_count_array(dt1, dt2, holidays=us).tolist(),
+            [relativedelta(a, b, holidays=us).bdays for a, b in zip(dt1, dt2)],
+        )
+        start = np.datetime64("1994-03-05")
+        ends = start + np.arange(0, 12000, 997)
+        self.assertEqual(
+            bday_count_array(ends, start, holidays=us).tolist(),
+            [relativedelta(e.item(), start.item(), holidays=us).bdays for e in ends],
+        )
+        self.assertEqual(
+            bday_count_array(start, ends).tolist(),
+            [relativedelta(start.item(), e.item()).bdays for e in ends],
+        )
+        self.assertRaises(ValueError, lambda: bday_count_array(["NaT"], ["2014-01-01"]))
+
+
+class TestArraysWithoutNumpy(unittest.TestCase):
+    def setUp(self):
+        self.np = bdateutil.arrays.np
+        bdateutil.arrays.np = None
+
+    def tearDown(self):
+        bdateutil.arrays.np = self.np
+
+    def test_import_error(self):
+        days = [date(2014, 1, 3)]
+        self.assertRaises(ImportError, lambda: isbday_array(days))
+        self.assertRaises(ImportError, lambda: bday_offset_array(days, 1))
+        self.assertRaises(ImportError, lambda: bday_count_array(days, days))
+
 
 class TestRelativeDelta(unittest.TestCase):
     def test_init(self):
@@ -60,6 +300,31 @@ class TestRelativeDelta(unittest.TestCase):
             relativedelta(months=-1, days=-1, bdays=-23),
         )
 
+    def test_init_bdays_count(self):
+        self.assertEqual(relativedelta("2014-01-04", "2014-01-04").bdays, 1)
+        self.assertEqual(relativedelta("2014-01-06", "2014-01-04").bdays, 1)
+        self.assertEqual(relativedelta("2014-01-04", "2014-01-06").bdays, -1)
+        self.assertEqual(
+            relativedelta(datetime(2014, 1, 7, 8), datetime(2014, 1, 3, 12)).bdays, 2
+        )
+        self.assertEqual(
+            relativedelta("2014-07-07", "2014-07-03", holidays=holidays.US()).bdays,
+            1,
+        )
+        self.assertEqual(
+            relativedelta(
+                "2014-07-07", "2014-07-03", holidays=[date(2014, 7, 4)]
+            ).bdays,
+            1,
+        )
+        us = holidays.US()
+        for hols in ((), us):
+            start, end = date(1994, 3, 5), date(2024, 6, 11)
+            days = (start + timedelta(days=i + 1) for i in range((end - start).days))
+            expected = sum(1 for d in days if d.weekday() < 5 and d not in hols)
+            self.assertEqual(relativedelta(end, start, holidays=hols).bdays, expected)
+            self.assertEqual(relativedelta(start, end, holidays=hols).bdays, -expected)
+
     def test_add(self):
         rd1 = relativedelta(years=+1, months=+2, bdays=+3, days=+4)
         rd2 = relativedelta(years=+2, months=-3, bdays=+4, days=+5)
@@ -76,6 +341,32 @@ class TestRelativeDelta(unittest.TestCase):
         self.assertEqual(date(2014, 1, 7) + relativedelta(bdays=-2), date(2014, 1, 3))
         self.assertEqual(date(2014, 2, 3) + relativedelta(bdays=-19), date(2014, 1, 7))
 
+    def test_add_bdays_index(self):
+        def walk(dt, bdays, hols):
+            step = timedelta(days=1 if bdays > 0 else -1)
+            for _ in range(abs(bdays)):
+                dt += step
+                while dt.weekday() in (5, 6) or dt in hols:
+                    dt += step
+            return dt
+
+        us = holidays.US()
+        for hols in ((), us):
+            for start in (date(2014, 1, 4), date(2014, 7, 3), date(1999, 12, 31)):
+                for bdays in (1, -1, 5, -5, 260, -260, 2500, -2500):
+                    self.assertEqual(
+                        start + relativedelta(bdays=bdays, holidays=hols),
+                        walk(start, bdays, hols),
+                    )
+        self.assertEqual(
+            datetime(2014, 1, 3, 12, 30) + relativedelta(bdays=1),
+            datetime(2014, 1, 6, 12, 30),
+        )
+        self.assertEqual(date(2014, 1, 4) + relativedelta(bdays=0), date(2014, 1, 4))
+        self.assertRaises(
+            OverflowError, lambda: date(9999, 12, 30) + relativedelta(bdays=5)
+        )
+
     def test_sub(self):
         rd1 = relativedelta(years=+1, months=+2, bdays=+3, days=+4)
         rd2 = relativedelta(years=+2, months=-3, bdays=+4, days=+5)
@@ -224,6 +515,174 @@ class TestParser(unittest.TestCase):
             parse("1/2/2014", parserinfo(dayfirst=True)), datetime(2014, 2, 1)
         )
 
+    def test_iso(self):
+        for timestr in (
+            "2014-07-03",
+            "2014-07-03T10:30",
+            "2014-07-03 10:30:15",
+            "2014-07-03T10:30:15.12",
+            "2014-07-03T10:30:15.123456+02:00",
+            "2014-07-03T10:30:15-0530",
+            "2014-07-03T10:30:15+01",
+            "2014-07-03T10:30:15Z",
+            "2014-07-03T10:30:15+00:00",
+            "2014-07-03T10:30:15.1234567",
+            "2014-07-03T10:30:15 +02:00",
+            " 2014-07-03",
+        ):
+            expected = dateutil_parser.parse(timestr)
+            ret = parse(timestr)
+            self.assertEqual(repr(ret), repr(expected))
+            self.assertEqual(repr(ret.tzinfo), repr(expected.tzinfo))
+            self.assertEqual(ret.utcoffset(), expected.utcoffset())
+        self.assertIs(
+            parse("2014-07-03T10:30+01:00").tzinfo, dateutil_tz.tzoffset(None, 3600)
+        )
+        self.assertEqual(parse("2014-07-03", dayfirst=True), datetime(2014, 3, 7))
+        self.assertRaises(ValueError, lambda: parse("2014-02-30"))
+        self.assertRaises(ValueError, lambda: parse("2014-07-03T24:00"))
+
+    def test_parser_reuse(self):
+        from bdateutil.parser import _get_parser
+
+        info = parserinfo(dayfirst=True)
+        self.assertIs(_get_parser(), _get_parser())
+        self.assertIs(_get_parser(info), _get_parser(info))
+        self.assertIsNot(_get_parser(info), _get_parser())
+        self.assertIs(_get_parser(info).info, info)
+
+        class DayFirst(parserinfo):
+            def __init__(self):
+                parserinfo.__init__(self, dayfirst=True)
+
+        self.assertIs(_get_parser(DayFirst), _get_parser(DayFirst))
+        self.assertEqual(parse("1/2/2014", DayFirst), datetime(2014, 2, 1))
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        info = parserinfo(dayfirst=True)
+        args = [
+            ("1/2/2014", None),
+            ("1/2/2014", info),
+            ("Thu, July 3rd 2014 10:30 AM", None),
+            ("2014-07-03T10:30:15+02:00", None),
+            ("3 Jul 2014 10:30 -0500", info),
+        ] * 200
+        expected = [parse(timestr, pinfo) for timestr, pinfo in args]
+        with ThreadPoolExecutor(8) as executor:
+            ret = list(executor.map(lambda a: parse(*a), args))
+        self.assertEqual(ret, expected)
+
+    def test_cache(self):
+        from bdateutil.parser import parse_cache
+
+        maxsize, enabled = parse_cache.maxsize, parse_cache.enabled
+        parse_cache.cache_clear()
+        try:
+            parse("July 3rd 2014")
+            self.assertEqual(parse_cache.cache_info().currsize, 0)
+            ret = parse("July 3rd 2014", cache=True)
+            self.assertIs(parse("July 3rd 2014", cache=True), ret)
+            self.assertIs(
+                parse(b"July 3rd 2014", cache=True), parse(b"July 3rd 2014", cache=True)
+            )
+            self.assertEqual(parse(b"July 3rd 2014", cache=True), ret)
+            self.assertEqual(
+                parse("1/2/2014", cache=True, dayfirst=True), datetime(2014, 2, 1)
+            )
+            self.assertEqual(parse("1/2/2014", cache=True), datetime(2014, 1, 2))
+            self.assertEqual(tuple(parse_cache.cache_info()), (3, 4, 0, maxsize, 4))
+            parse_cache.enabled = True
+            parse_cache.maxsize = 2
+            parse("July 4th 2014")
+            parse("July 5th 2014")
+            parse("July 5th 2014", cache=False)
+            tzinfos = {"EST": -18000}
+            parse("July 5th 2014 10:30 EST", tzinfos=tzinfos)
+            info = parse_cache.cache_info()
+            self.assertEqual((info.hits, info.evictions, info.currsize), (3, 4, 2))
+            self.assertEqual(info.misses, 7)
+            parse_cache.cache_clear()
+            self.assertEqual(tuple(parse_cache.cache_info()), (0, 0, 0, 2, 0))
+        finally:
+            parse_cache.maxsize, parse_cache.enabled = maxsize, enabled
+            parse_cache.cache_clear()
+
+    def test_parse_many(self):
+        start = datetime(2014, 1, 1, 9, 30)
+        for fmt, kwargs in (
+            ("%d/%m/%Y %H:%M:%S", {}),
+            ("%d/%m/%Y %H:%M:%S", {"dayfirst": True}),
+            ("%m-%d-%Y %I:%M %p", {}),
+            ("%a, %d %b %Y %H:%M:%S+02:00", {}),
+            ("%Y/%m/%d %H:%M:%S.%fZ", {"yearfirst": True}),
+        ):
+            rows = [(start + timedelta(hours=37 * i)).strftime(fmt) for i in range(300)]
+            rows[150:150] = ["July 3rd 2014", b"07/03/2014", "13/13/2014 10:00"]
+            expected = []
+            for row in rows:
+                try:
+                    expected.append(parse(row, **kwargs))
+                except ValueError:
+                    expected.append(ValueError)
+            ret = []
+            it = parse_many(rows, **kwargs)
+            for _ in rows:
+                try:
+                    ret.append(next(it))
+                except ValueError:
+                    ret.append(ValueError)
+            self.assertRaises(StopIteration, next, it)
+            self.assertEqual([repr(dt) for dt in ret], [repr(dt) for dt in expected])
+            self.assertIsNotNone(it.plan)
+            self.assertEqual((it.total, it.fast), (303, 300))
+            self.assertAlmostEqual(it.fast_ratio, 300 / 303.0)
+        it = parse_many(["07-03-2014 10:30 PM", "07-04-2014 09:15 AM"])
+        self.assertEqual(
+            list(it), [datetime(2014, 7, 3, 22, 30), datetime(2014, 7, 4, 9, 15)]
+        )
+        self.assertEqual(str(it.plan), "%m-%d-%Y %I:%M %p")
+        it = parse_many(["20140703", "20140704"])
+        self.assertEqual(list(it), [datetime(2014, 7, 3), datetime(2014, 7, 4)])
+        self.assertIsNone(it.plan)
+        self.assertEqual(it.fast_ratio, 0)
+        it = parse_many(["07/03/2014"] * 3, fuzzy=True)
+        self.assertEqual(list(it), [datetime(2014, 7, 3)] * 3)
+        self.assertIsNone(it.plan)
+
+    def test_parse_stream(self):
+        start = datetime(2014, 1, 1, 9, 30)
+        rows = [
+            (start + timedelta(hours=37 * i)).strftime("%d %b %Y %H:%M:%S")
+            for i in range(50)
+        ]
+        expected = [parse(row) for row in rows]
+        for encoding in ("utf-8", "utf-16"):
+            for newline in ("\n", "\r\n", "\r"):
+                text = newline.join(rows) + newline * 2
+                for chunksize in (1, 3, 1 << 16):
+                    fileobj = io.BytesIO(text.encode(encoding))
+                    it = parse_stream(fileobj, encoding=encoding, chunksize=chunksize)
+                    self.assertEqual(list(it), expected)
+                    self.assertEqual(it.fast_ratio, 1)
+                    it = parse_stream(io.StringIO(text), chunksize=chunksize)
+                    self.assertEqual(list(it), expected)
+        for sep in (";", b"||"):
+            text = sep.join(
+                row.encode() if isinstance(sep, bytes) else row for row in rows
+            )
+            fileobj = io.BytesIO(text) if isinstance(sep, bytes) else io.StringIO(text)
+            self.assertEqual(
+                list(parse_stream(fileobj, sep=sep, chunksize=4)), expected
+            )
+        self.assertEqual(list(parse_stream(io.BytesIO(b""))), [])
+        self.assertEqual(
+            list(parse_stream(io.StringIO("Opened on July 3rd 2014\n"), fuzzy=True)),
+            [datetime(2014, 7, 3)],
+        )
+        self.assertRaises(ValueError, parse_stream, io.StringIO(""), sep="")
+
     def test_exceptions(self):
         self.assertRaises(ValueError, lambda: parse("abc"))
         self.assertRaises(TypeError, lambda: parse(["a", "b", "c"]))
@@ -242,6 +701,325 @@ class TestRRule(unittest.TestCase):
             ],
         )
 
+    def test_bdaily_count(self):
+        cal = BusinessCalendar(holidays=holidays.US())
+        rule = rrule(BDAILY, count=10, dtstart="2014-12-20", calendar=cal)
+        self.assertEqual(len(list(rule)), 10)
+        self.assertEqual(rule.count(), 10)
+        self.assertEqual(rule[0], datetime(2014, 12, 22))
+        self.assertEqual(rule[-1], datetime(2015, 1, 6))
+        rule = rrule(BDAILY, count=3, dtstart="2014-12-24", cache=True, calendar=cal)
+        self.assertEqual(list(rule), list(rule))
+        self.assertEqual(
+            list(rule),
+            [datetime(2014, 12, 24), datetime(2014, 12, 26), datetime(2014, 12, 29)],
+        )
+
+    def test_bdaily_holidays(self):
+        us = holidays.US()
+        self.assertEqual(
+            list(rrule(BDAILY, count=3, dtstart="2014-12-24", holidays=us)),
+            [datetime(2014, 12, 24), datetime(2014, 12, 26), datetime(2014, 12, 29)],
+        )
+        rule = rrule(BDAILY, dtstart="2000-01-01", until="2019-12-31", holidays=us)
+        expected = [
+            d
+            for d in rrule(DAILY, dtstart="2000-01-01", until="2019-12-31")
+            if d.weekday() < 5 and d not in us
+        ]
+        self.assertEqual(list(rule), expected)
+        self.assertEqual(
+            list(rrule(BDAILY, count=2, dtstart="2014-07-03", byhour=9, holidays=us)),
+            [datetime(2014, 7, 3, 9), datetime(2014, 7, 7, 9)],
+        )
+
+    def test_bdaily_getitem(self):
+        us = holidays.US()
+        rule = rrule(BDAILY, dtstart="2014-01-01", holidays=us)
+        self.assertEqual(rule[0], datetime(2014, 1, 2))
+        self.assertEqual(rule[2], datetime(2014, 1, 6))
+        self.assertEqual(rule[5000], list(islice(rule, 5001))[-1])
+        self.assertEqual(rule[1:7:2], list(islice(rule, 1, 7, 2)))
+        rule = rrule(BDAILY, dtstart="2014-07-01", until="2014-07-31", holidays=us)
+        self.assertEqual(rule.count(), 22)
+        self.assertEqual(rule[-1], datetime(2014, 7, 31))
+        self.assertEqual(rule[-22], datetime(2014, 7, 1))
+        self.assertEqual(rule[::-5], list(rule)[::-5])
+        self.assertRaises(IndexError, lambda: rule[22])
+        self.assertRaises(IndexError, lambda: rule[-23])
+        rule = rrule(BDAILY, count=10, dtstart="2014-07-01", until="2014-07-08")
+        self.assertEqual(rule.count(), 6)
+        self.assertRaises(IndexError, lambda: rule[6])
+        self.assertEqual(rrule(BDAILY, count=10, dtstart="2014-07-01").count(), 10)
+
+    def test_bdaily_search(self):
+        us = holidays.US()
+        rule = rrule(BDAILY, dtstart="1990-01-01 09:00", holidays=us)
+        dt = datetime(2014, 7, 3, 12)
+        self.assertEqual(rule.after(dt), datetime(2014, 7, 7, 9))
+        self.assertEqual(rule.after(datetime(2014, 7, 7, 9)), datetime(2014, 7, 8, 9))
+        self.assertEqual(
+            rule.after(datetime(2014, 7, 7, 9), inc=True), datetime(2014, 7, 7, 9)
+        )
+        self.assertEqual(rule.before(dt), datetime(2014, 7, 3, 9))
+        self.assertEqual(rule.before(datetime(2014, 7, 3, 9)), datetime(2014, 7, 2, 9))
+        self.assertEqual(
+            rule.between(datetime(2014, 7, 2, 9), datetime(2014, 7, 8, 9)),
+            [datetime(2014, 7, 3, 9), datetime(2014, 7, 7, 9)],
+        )
+        self.assertEqual(
+            rule.between(datetime(2014, 7, 2, 9), datetime(2014, 7, 8, 9), inc=True),
+            [datetime(2014, 7, d, 9) for d in (2, 3, 7, 8)],
+        )
+        self.assertIn(datetime(2014, 7, 3, 9), rule)
+        self.assertNotIn(datetime(2014, 7, 4, 9), rule)
+        self.assertNotIn(datetime(2014, 7, 3), rule)
+        self.assertIsNone(rule.before(datetime(1990, 1, 1, 9)))
+        rule = rrule(BDAILY, count=3, dtstart="2014-07-02")
+        self.assertIsNone(rule.after(datetime(2014, 7, 4)))
+        self.assertEqual(rule.before(datetime(2015, 1, 1)), datetime(2014, 7, 4))
+
+    def test_bdaily_filtered(self):
+        self.assertEqual(
+            list(rrule(BDAILY, count=3, dtstart="2014-01-03", byhour=(9, 17))),
+            [
+                datetime(2014, 1, 3, 9),
+                datetime(2014, 1, 3, 17),
+                datetime(2014, 1, 6, 9),
+            ],
+        )
+        self.assertEqual(
+            list(rrule(BDAILY, count=3, interval=2, dtstart="2014-01-01")),
+            [datetime(2014, 1, 1), datetime(2014, 1, 3), datetime(2014, 1, 7)],
+        )
+
+    def test_business_periods(self):
+        us = holidays.US()
+        self.assertEqual(
+            list(rrule(BMONTHLY, count=3, dtstart="2014-01-01")),
+            [datetime(2014, 1, 31), datetime(2014, 2, 28), datetime(2014, 3, 31)],
+        )
+        self.assertEqual(
+            list(
+                rrule(BMONTHLY, count=3, dtstart="2014-06-01", bysetpos=1, holidays=us)
+            ),
+            [datetime(2014, 6, 2), datetime(2014, 7, 1), datetime(2014, 8, 1)],
+        )
+        self.assertEqual(
+            list(
+                rrule(
+                    BQUARTERLY, count=3, dtstart="2014-02-01", bysetpos=1, holidays=us
+                )
+            ),
+            [datetime(2014, 4, 1), datetime(2014, 7, 1), datetime(2014, 10, 1)],
+        )
+        self.assertEqual(
+            list(rrule(BYEARLY, count=2, dtstart="2014-01-01", holidays=us)),
+            [datetime(2014, 12, 31), datetime(2015, 12, 31)],
+        )
+        self.assertEqual(
+            list(rrule(BYEARLY, count=2, dtstart="2014-01-01", bysetpos=(1, -1))),
+            [datetime(2014, 1, 1), datetime(2014, 12, 31)],
+        )
+        self.assertEqual(
+            list(rrule(BMONTHLY, dtstart="2014-01-15", until="2014-06-30", interval=2)),
+            [datetime(2014, 1, 31), datetime(2014, 3, 31), datetime(2014, 5, 30)],
+        )
+        self.assertRaises(
+            ValueError, lambda: rrule(BMONTHLY, dtstart="2014-01-01", byweekday=MO)
+        )
+
+    def test_business_rrulestr(self):
+        us = holidays.US()
+        for freq in (BDAILY, BMONTHLY, BQUARTERLY, BYEARLY):
+            rule = rrule(freq, count=5, dtstart="2014-01-01 09:30", bysetpos=1)
+            if freq == BDAILY:
+                rule = rrule(freq, count=5, dtstart="2014-01-01 09:30")
+            self.assertEqual(list(rrulestr(str(rule))), list(rule))
+        text = "DTSTART:20140101T000000\nRRULE:FREQ=BMONTHLY;COUNT=2;BYSETPOS=1"
+        self.assertEqual(
+            list(rrulestr(text, holidays=us)),
+            [datetime(2014, 1, 2), datetime(2014, 2, 3)],
+        )
+        self.assertEqual(str(rrulestr(text)), text)
+
+    def test_rrulestr_cache(self):
+        us = holidays.US()
+        text = "DTSTART:20140101T000000\nRRULE:FREQ=BDAILY;COUNT=3"
+        rrulestr.cache_clear()
+        rule = rrulestr(text)
+        self.assertIs(rrulestr(text), rule)
+        self.assertIsNot(rrulestr(text, holidays=us), rule)
+        self.assertIsNot(rrulestr(text, cache=True), rule)
+        self.assertEqual(rrulestr.cache_info(), (1, 3, 256, 3))
+        self.assertEqual(
+            list(rrulestr(text, holidays=us)),
+            [datetime(2014, 1, 2), datetime(2014, 1, 3), datetime(2014, 1, 6)],
+        )
+        rrulestr.cache_clear()
+        self.assertEqual(rrulestr.cache_info(), (0, 0, 256, 0))
+
+        text += "\nEXDATE:20140102T000000"
+        rset = rrulestr(text)
+        rset.exdate(datetime(2014, 1, 3))
+        self.assertEqual(list(rset), [datetime(2014, 1, 1)])
+        self.assertEqual(
+            list(rrulestr(text)), [datetime(2014, 1, 1), datetime(2014, 1, 3)]
+        )
+        self.assertIsNot(rrulestr(text), rrulestr(text))
+
+        small = type(rrulestr)(maxsize=1)
+        small("RRULE:FREQ=DAILY;COUNT=1", dtstart=datetime(2014, 1, 1))
+        small("RRULE:FREQ=DAILY;COUNT=2", dtstart=datetime(2014, 1, 1))
+        self.assertEqual(small.cache_info().currsize, 1)
+        small("RRULE:FREQ=DAILY;COUNT=1", dtstart=datetime(2014, 1, 1), tzinfos={})
+        self.assertEqual(small.cache_info(), (0, 3, 1, 1))
+
+        rrulestr.cache_clear()
+        # Without DTSTART the rules start when they are built
+        first = rrulestr("FREQ=DAILY;COUNT=2")
+        self.assertIsNot(rrulestr("FREQ=DAILY;COUNT=2"), first)
+        self.assertIsNot(rrulestr("RRULE:FREQ=DAILY;COUNT=2"), first)
+        self.assertEqual(rrulestr.cache_info(), (0, 3, 256, 0))
+
+    def test_rruleset(self):
+        rule = rrule(DAILY, dtstart="2014-06-28 09:00", until="2014-07-12 09:00")
+        rset = rruleset()
+        rset.rrule(rule)
+        rset.exrange("2014-06-30", "2014-07-03")
+        rset.exrange("2014-07-02", date(2014, 7, 8))
+        rset.exrange("2014-07-10")
+        rset.exdate(datetime(2014, 7, 11, 9))
+        self.assertEqual(
+            list(rset),
+            [datetime(2014, 6, d, 9) for d in (28, 29)]
+            + [datetime(2014, 7, d, 9) for d in (9, 12)],
+        )
+        self.assertEqual(rset.count(), 4)
+        self.assertRaises(ValueError, lambda: rset.exrange("2014-07-02", "2014-07-01"))
+
+        rset = rruleset(holidays=holidays.US())
+        rset.rrule(rule)
+        self.assertNotIn(datetime(2014, 7, 4, 9), list(rset))
+        self.assertIn(datetime(2014, 7, 5, 9), list(rset))
+        rset = rruleset(calendar=BusinessCalendar(holidays=holidays.US()))
+        rset.rrule(rule)
+        rset.rdate(datetime(2014, 7, 13, 9))
+        self.assertEqual(
+            list(rset),
+            list(
+                rrule(BDAILY, dtstart=rule[0], until=rule[-1], holidays=holidays.US())
+            ),
+        )
+        self.assertIsInstance(
+            rrulestr("RRULE:FREQ=DAILY;COUNT=1", forceset=True), rruleset
+        )
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_to_array(self):
+        us = holidays.US()
+        rules = [
+            rrule(BDAILY, dtstart="2014-06-30 09:30", until="2014-12-31", holidays=us),
+            rrule(HOURLY, dtstart="2014-07-01", count=1000, interval=7),
+            rrule(WEEKLY, dtstart="2014-07-01 10:00", until="2015-07-01", interval=2),
+            rrule(WEEKLY, dtstart="2014-07-01", count=20, byweekday=(MO, FR)),
+            rrule(MONTHLY, dtstart="2014-07-01", count=12, byweekday=FR(-1)),
+            rrule(BMONTHLY, dtstart="2014-07-01", count=12, holidays=us),
+        ]
+        for rule in rules:
+            expected = np.array(list(rule), dtype="datetime64[s]")
+            self.assertTrue((rule.to_array() == expected).all())
+            batches = list(rule.iter_batches(100))
+            self.assertTrue(all(len(b) <= 100 for b in batches))
+            self.assertTrue((np.concatenate(batches) == expected).all())
+        # Rules without by* arguments are computed without iterating
+        rule = rrule(WEEKLY, dtstart="2014-07-01", count=3)
+        rule._batches_iter = None
+        self.assertEqual(
+            rule.to_array("D").tolist(),
+            [date(2014, 7, 1), date(2014, 7, 8), date(2014, 7, 15)],
+        )
+        rule = rrule(BDAILY, count=3, dtstart="2014-07-03")
+        self.assertEqual(
+            rule.to_array("D").tolist(),
+            [date(2014, 7, 3), date(2014, 7, 4), date(2014, 7, 7)],
+        )
+        rule = rrule(DAILY, count=2, dtstart=datetime(2014, 7, 3, tzinfo=timezone.utc))
+        self.assertEqual(
+            rule.to_array().tolist(), [datetime(2014, 7, 3), datetime(2014, 7, 4)]
+        )
+        self.assertEqual(len(rrule(DAILY, count=0, dtstart="2014-07-03").to_array()), 0)
+
+    def test_pickle(self):
+        us = holidays.US()
+        cal = BusinessCalendar(holidays=us)
+        rset = rruleset(calendar=cal, cache=True)
+        rset.rrule(rrule(MONTHLY, dtstart="2014-01-31", count=12, byweekday=FR(-1)))
+        rset.exrange("2014-05-01", "2014-06-30")
+        rset.rdate(datetime(2014, 7, 4))
+        rules = [
+            rrule(BDAILY, dtstart="2014-01-01", count=300, holidays=us, cache=True),
+            rrule(BMONTHLY, dtstart="2014-01-01", count=12, calendar=cal, bysetpos=2),
+            rrule(BDAILY, dtstart="2014-01-01", count=30, interval=3, byhour=(9, 15)),
+            rrulestr("DTSTART:20140101T000000\nRRULE:FREQ=BQUARTERLY;COUNT=8"),
+            rset,
+        ]
+        calendars = {"us": us, "cal": cal}
+        for rule in rules:
+            expected = list(rule)
+            copies = [
+                pickle.loads(pickle.dumps(rule)),
+                loads_rule(dumps_rule(rule)),
+                loads_rule(dumps_rule(rule, calendars), calendars),
+            ]
+            for copy in copies:
+                self.assertIs(type(copy), type(rule))
+                self.assertEqual(list(copy), expected)
+        self.assertLess(len(dumps_rule(rules[1], calendars)), 200)
+        copy = loads_rule(dumps_rule(rules[1], calendars), calendars)
+        self.assertIs(copy._calendar, cal)
+        self.assertEqual(str(copy), str(rules[1]))
+        self.assertRaises(ValueError, loads_rule, dumps_rule(rules[1], calendars))
+        copy = rules[1].replace(count=3)
+        self.assertIsInstance(copy, rrule)
+        self.assertIs(copy._calendar, cal)
+        self.assertEqual(copy.count(), 3)
+
+    def test_parallel(self):
+        us = holidays.US()
+        cal = BusinessCalendar(workdays=(6, 0, 1, 2, 3), holidays=us)
+        rset = rruleset(calendar=cal)
+        rset.rrule(rrule(DAILY, dtstart="2014-07-01", count=30))
+        rset.exrange("2014-07-07", "2014-07-08")
+        rules = [
+            rrule(BDAILY, dtstart="2000-01-01", until="2020-01-01", holidays=us),
+            rrule(BDAILY, dtstart="2014-06-30", count=500, calendar=cal, cache=True),
+            rrule(BMONTHLY, dtstart="2014-01-01", count=24, holidays=us),
+            rrule(WEEKLY, dtstart="2014-01-01", count=50, byweekday=(MO, FR)),
+            rset,
+        ]
+        expected = [list(rule) for rule in rules]
+        self.assertEqual(expand_rules(rules, max_workers=2), expected)
+        self.assertEqual(
+            list(expand_merged(rules, max_workers=2)),
+            sorted(dt for dts in expected for dt in dts),
+        )
+        for rule in rules:
+            for partitions in (1, 3, 7):
+                self.assertEqual(
+                    expand_rule(rule, partitions, max_workers=2), list(rule)
+                )
+        if np is not None:
+            arrays = expand_rules(rules, max_workers=2, as_arrays=True)
+            for arr, dts in zip(arrays, expected):
+                self.assertTrue((arr == np.array(dts, dtype="datetime64[s]")).all())
+            self.assertTrue(
+                (
+                    expand_rule(rules[0], 5, max_workers=2, as_arrays=True)
+                    == rules[0].to_array()
+                ).all()
+            )
+
     def test_parse(self):
         self.assertEqual(
             list(rrule(BDAILY, count=4, dtstart="2014-01-01")),